@@ -1,4 +1,5 @@
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 
@@ -13,6 +14,8 @@ if str(INTEGRACAO_DIR) not in sys.path:
 
 from integracao_api.processor import ProcessadorArquivos
 from integracao_api.utils import limpar_cnpj
+from transformacao.agregacao import AgregadorDados
+from transformacao.enriquecimento import EnriquecedorDados
 from transformacao.validacao import ValidadorDados
 
 
@@ -21,10 +24,22 @@ class TestETLUtils(unittest.TestCase):
         self.assertEqual(limpar_cnpj("12.345.678/0001-90"), "12345678000190")
         self.assertEqual(limpar_cnpj("  123  "), "123")
 
+    def test_limpar_cnpjs_vetorizado(self):
+        cnpjs = pd.Series(["12.345.678/0001-90", "01222333000181", None])
+        limpos = EnriquecedorDados.limpar_cnpjs(cnpjs)
+        self.assertEqual(limpos.iloc[0], "12345678000190")
+        self.assertEqual(limpos.iloc[1], "01222333000181")
+        self.assertTrue(pd.isna(limpos.iloc[2]))
+
     def test_validar_digito_cnpj(self):
         self.assertTrue(ValidadorDados.validar_digito_cnpj("11222333000181"))
         self.assertFalse(ValidadorDados.validar_digito_cnpj("11222333000182"))
 
+    def test_validar_digitos_cnpjs_vetorizado(self):
+        cnpjs = pd.Series(["11222333000181", "11222333000182", "19541931000125", "11111111111111", "00000000000000"])
+        esperado = [ValidadorDados.validar_digito_cnpj(cnpj) for cnpj in cnpjs]
+        self.assertEqual(ValidadorDados.validar_digitos_cnpjs(cnpjs).tolist(), esperado)
+
     def test_limpar_dados_flags(self):
         df = pd.DataFrame(
             [
@@ -56,5 +71,243 @@ class TestETLUtils(unittest.TestCase):
         self.assertIn("VALOR_NEGATIVO", flags_1)
 
 
+class TestValidacao(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.temp_dir.name)
+        self.arquivo = self.base / "consolidado.csv"
+        linhas = [
+            "CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas",
+            "01222333000128;OPERADORA A;1;2025;100.0",
+            "11222333000182;OPERADORA B;2;2025;-5.0",
+            ";;3;2025;0.0",
+            "11.222.333/0001-81;OP;4;2025;",
+            "01222333000128;OPERADORA A;2;2025;50.0",
+        ]
+        self.arquivo.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_stream_equivale_a_validacao_em_memoria(self):
+        em_memoria = ValidadorDados(self.arquivo)
+        em_memoria.carregar_dados()
+        em_memoria.validar_bloco(em_memoria.df)
+
+        stream = ValidadorDados(self.arquivo)
+        saida = self.base / "validados.csv"
+        stream.processar_stream(saida, tamanho_bloco=64)
+
+        df = pd.read_csv(saida, sep=";", dtype={"CNPJ": str})
+        self.assertEqual(df.loc[0, "CNPJ"], "01222333000128")
+        self.assertEqual(df["cnpj_valido"].tolist(), em_memoria.df["cnpj_valido"].tolist())
+        self.assertEqual(df["valor_valido"].tolist(), em_memoria.df["valor_valido"].tolist())
+        self.assertEqual(em_memoria.df["motivo_cnpj_invalido"].dtype, "category")
+        self.assertEqual(df["motivo_cnpj_invalido"].fillna("").tolist(), em_memoria.df["motivo_cnpj_invalido"].tolist())
+        self.assertEqual(stream.resumo["total"], 5)
+        self.assertEqual(stream.resumo["cnpj_valido"], 3)
+        self.assertEqual(stream.resumo["valor_nulo"], 1)
+        self.assertEqual(stream.resumo["razao_vazia"], 1)
+        self.assertEqual(stream.resumo["razao_muito_curta"], 2)
+
+    def test_stream_com_valores_invalidos_em_blocos_seguintes(self):
+        linhas = ["CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas"]
+        linhas += ["11222333000181;OPERADORA A;;2025;100.0"] * 4
+        linhas += [
+            "11222333000181;OPERADORA A;2;2025;abc",
+            "11222333000181;OPERADORA A;1T;2025;10.0",
+            "11222333000181;OPERADORA A;3;20X5;20.0",
+        ]
+        self.arquivo.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+        validador = ValidadorDados(self.arquivo)
+        saida = self.base / "validados.csv"
+        validador.processar_stream(saida, tamanho_bloco=64)
+
+        df = pd.read_csv(saida, sep=";", dtype={"CNPJ": str})
+        self.assertEqual(len(df), 7)
+        self.assertTrue(pd.isna(df.loc[4, "ValorDespesas"]))
+        self.assertFalse(df.loc[5, "trimestre_valido"])
+        self.assertTrue(df.loc[4, "trimestre_valido"])
+        self.assertFalse(df.loc[6, "ano_valido"])
+        self.assertEqual(validador.resumo["valor_nulo"], 1)
+        self.assertEqual(validador.resumo["trimestre_valido"], 2)
+
+    def test_cnpj_sem_zero_a_esquerda(self):
+        validador = ValidadorDados(self.arquivo)
+        df = validador.validar_bloco(pd.DataFrame({"CNPJ": ["1222333000128", "", None]}))
+        self.assertEqual(df["CNPJ"].tolist(), ["01222333000128", "", ""])
+        self.assertEqual(df["cnpj_valido"].tolist(), [True, False, False])
+
+
+class TestAgregacao(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.arquivo = Path(self.temp_dir.name) / "enriquecidos.csv"
+        linhas = [
+            "CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas;UF",
+            "01222333000181;OPERADORA A;1;2025;100.0;SP",
+            "01222333000181;OPERADORA A;1;2025;50.0;SP",
+            "01222333000181;OPERADORA A;2;2025;150.0;SP",
+            "22333444000155;OPERADORA B;1;2025;500.0;",
+            "22333444000155;OPERADORA B;2;2025;-1.0;",
+        ]
+        self.arquivo.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_agregacao_por_trimestre_e_ranking(self):
+        agregador = AgregadorDados(self.arquivo)
+        agregador.carregar_dados()
+        agregador.preparar_dados()
+        agregador.agregar_dados()
+        agregador.ordenar_dados()
+
+        df = agregador.df_agregado.reset_index(drop=True)
+        self.assertEqual(df["RazaoSocial"].tolist(), ["OPERADORA B", "OPERADORA A"])
+        self.assertEqual(df["Ranking"].tolist(), [1, 2])
+        self.assertEqual(df.loc[0, "UF"], "NÃO_INFORMADO")
+        self.assertEqual(df.loc[1, "TotalDespesas"], 300.0)
+        self.assertEqual(df.loc[1, "NumeroTrimestres"], 2)
+        self.assertEqual(df.loc[1, "MediaDespesas"], 150.0)
+
+    def test_estatisticas_sem_grupos(self):
+        self.arquivo.write_text(
+            "CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas;UF\n"
+            "01222333000181;OPERADORA A;1;2025;-1.0;SP\n",
+            encoding="utf-8",
+        )
+        agregador = AgregadorDados(self.arquivo)
+        agregador.carregar_dados()
+        agregador.preparar_dados()
+        agregador.agregar_dados()
+        agregador.ordenar_dados()
+
+        estatisticas = agregador.gerar_analise_estatistica()
+        self.assertEqual(estatisticas["total_grupos"], 0)
+        self.assertTrue(pd.isna(estatisticas["min_total_despesas"]))
+        self.assertTrue(pd.isna(estatisticas["max_total_despesas"]))
+
+
+class TestEnriquecimento(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        self.base = base
+
+        self.cadastro = base / "cadastro.csv"
+        self.cadastro.write_text(
+            "\n".join([
+                "REGISTRO_OPERADORA;CNPJ;Razao_Social;Modalidade;UF",
+                '"123";"01222333000181";"OPERADORA A";"Medicina de Grupo";"SP"',
+                '"456";"22333444000155";"OPERADORA B";"Cooperativa Médica";"MG"',
+            ]) + "\n",
+            encoding="utf-8",
+        )
+
+        linhas = ["CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas"]
+        for i in range(40):
+            cnpj = ["01222333000181", "22333444000155", "99888777000166", ""][i % 4]
+            linhas.append(f"{cnpj};OPERADORA {i % 4};{i % 4 + 1};2025;{i * 10.5}")
+        self.despesas = base / "despesas.csv"
+        self.despesas.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _enriquecedor(self):
+        enriquecedor = EnriquecedorDados(self.despesas)
+        enriquecedor.carregar_dados_cadastrais(self.cadastro)
+        return enriquecedor
+
+    def test_join_em_memoria(self):
+        enriquecedor = self._enriquecedor()
+        enriquecedor.carregar_despesas()
+        enriquecedor.realizar_join()
+
+        df = enriquecedor.df_enriquecido
+        self.assertEqual(len(df), 40)
+        self.assertEqual(df.loc[0, "CNPJ"], "01222333000181")
+        self.assertEqual(df.loc[0, "RegistroANS"], 123)
+        self.assertEqual(df.loc[1, "UF"], "MG")
+        self.assertEqual(df.loc[2, "status_match"], "SEM_CADASTRO")
+        self.assertEqual(enriquecedor.resumo["sem_match"], 20)
+
+    def test_stream_equivale_ao_join_em_memoria(self):
+        em_memoria = self._enriquecedor()
+        em_memoria.carregar_despesas()
+        em_memoria.realizar_join()
+
+        stream = self._enriquecedor()
+        saida = self.base / "enriquecidos.parquet"
+        stream.processar_stream(saida, tamanho_bloco=256)
+
+        pd.testing.assert_frame_equal(
+            pd.read_parquet(saida),
+            em_memoria.df_enriquecido.reset_index(drop=True),
+        )
+        self.assertEqual(stream.resumo["total"], em_memoria.resumo["total"])
+        self.assertEqual(stream.resumo["sem_match"], em_memoria.resumo["sem_match"])
+        pd.testing.assert_series_equal(
+            stream.resumo["cnpjs_sem_cadastro"], em_memoria.resumo["cnpjs_sem_cadastro"]
+        )
+
+    def test_stream_com_trimestre_e_ano_fora_da_faixa(self):
+        consolidado = self.base / "consolidado.csv"
+        consolidado.write_text(
+            "\n".join([
+                "CNPJ;RazaoSocial;Trimestre;Ano;ValorDespesas",
+                "01222333000181;OPERADORA A;1;2025;10.0",
+                "01222333000181;OPERADORA A;200;40000;20.0",
+                "22333444000155;OPERADORA B;2.5;2025;30.0",
+            ]) + "\n",
+            encoding="utf-8",
+        )
+        validados = self.base / "validados.csv"
+        ValidadorDados(consolidado).processar_stream(validados)
+
+        enriquecedor = EnriquecedorDados(validados)
+        enriquecedor.carregar_dados_cadastrais(self.cadastro)
+        saida = self.base / "enriquecidos.parquet"
+        enriquecedor.processar_stream(saida)
+
+        df = pd.read_parquet(saida)
+        self.assertEqual(df["Trimestre"].tolist(), [1.0, 200.0, 2.5])
+        self.assertEqual(df["Ano"].tolist(), [2025.0, 40000.0, 2025.0])
+        self.assertEqual(df["trimestre_valido"].tolist(), [True, False, True])
+
+        agregador = AgregadorDados(saida)
+        agregador.carregar_dados()
+        agregador.preparar_dados()
+        agregador.agregar_dados()
+        self.assertEqual(agregador.df_enriquecido["Ano"].dtype, "int32")
+
+    def test_cadastro_latin1_com_inicio_ascii(self):
+        linhas = ["REGISTRO_OPERADORA;CNPJ;Razao_Social;Modalidade;UF"]
+        linhas += [f'"{i}";"99{i:012d}";"OPERADORA {i}";"Medicina de Grupo";"SP"' for i in range(200)]
+        linhas.append('"456";"22333444000155";"OPERADORA B";"Cooperativa Médica";"MG"')
+        self.cadastro.write_bytes(("\n".join(linhas) + "\n").encode("latin-1"))
+
+        enriquecedor = self._enriquecedor()
+        cadastro = enriquecedor.df_cadastro.set_index("CNPJ")
+        self.assertEqual(cadastro.loc["22333444000155", "Modalidade"], "Cooperativa Médica")
+        self.assertEqual(cadastro.loc["22333444000155", "RegistroANS"], 456)
+
+    def test_cadastro_do_cache_parquet(self):
+        original = self._enriquecedor()
+        cache = self.base / "cadastro.parquet"
+        original.df_cadastro.to_parquet(cache, index=False)
+
+        do_cache = EnriquecedorDados(self.despesas)
+        do_cache.carregar_dados_cadastrais(cache)
+
+        for enriquecedor in (original, do_cache):
+            enriquecedor.carregar_despesas()
+            enriquecedor.realizar_join()
+
+        pd.testing.assert_frame_equal(do_cache.df_enriquecido, original.df_enriquecido)
+
+
 if __name__ == "__main__":
     unittest.main()
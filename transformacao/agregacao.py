@@ -14,9 +14,9 @@ Este módulo realiza agregações estatísticas dos dados enriquecidos:
 4. Geração do arquivo final
 
 Decisão Técnica: Pandas GroupBy + Sort
-- QuickSort (padrão Pandas): O(n log n)
+- Argsort estável (NumPy) + take: O(n log n)
 - Eficiente para ~1.500 operadoras
-- In-place quando possível
+- Empates mantêm a ordem do agrupamento (determinístico)
 
 Autor: [Seu Nome]
 Data: 29/01/2025
@@ -27,6 +27,7 @@ Uso:
 
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 import sys
 import zipfile
 from pathlib import Path
@@ -43,6 +44,16 @@ from integracao_api.utils import configurar_logging, bytes_para_humano
 # Configuração de logging
 logger = configurar_logging("agregacao.log")
 
+# Colunas usadas na agregação e seus tipos: só elas são lidas do arquivo
+# enriquecido (CNPJ, flags de validação e cadastro não entram na agregação)
+TIPOS_ENRIQUECIDOS = {
+    'RazaoSocial': 'category',
+    'UF': 'category',
+    'Ano': 'float64',
+    'Trimestre': 'float64',
+    'ValorDespesas': 'float64',
+}
+
 
 class AgregadorDados:
     """
@@ -60,7 +71,7 @@ class AgregadorDados:
         Inicializa o agregador.
         
         Args:
-            arquivo_entrada: Path do CSV com dados enriquecidos
+            arquivo_entrada: Path do Parquet (ou CSV) com dados enriquecidos
         """
         self.arquivo_entrada = arquivo_entrada
         self.df_enriquecido = None
@@ -76,12 +87,39 @@ class AgregadorDados:
         logger.info(f"Carregando: {self.arquivo_entrada}")
         
         try:
-            self.df_enriquecido = pd.read_csv(
-                self.arquivo_entrada,
-                sep=';',
-                encoding='utf-8',
-                low_memory=False
-            )
+            parquet = self.arquivo_entrada.suffix == '.parquet'
+            
+            # Ler só as colunas da agregação (UF pode não existir): o cabeçalho
+            # vem do schema do Parquet ou da primeira linha do CSV
+            if parquet:
+                cabecalho = pq.read_schema(self.arquivo_entrada).names
+            else:
+                cabecalho = pd.read_csv(
+                    self.arquivo_entrada, sep=';', encoding='utf-8', nrows=0
+                ).columns
+            tipos = {
+                coluna: tipo
+                for coluna, tipo in TIPOS_ENRIQUECIDOS.items()
+                if coluna in cabecalho
+            }
+            
+            if parquet:
+                # Parquet já é tipado; só ajusta as colunas da agregação
+                self.df_enriquecido = pd.read_parquet(
+                    self.arquivo_entrada,
+                    columns=list(tipos)
+                ).astype(tipos)
+            else:
+                # Parser multithread do PyArrow com tipos declarados: evita a
+                # inferência do pandas e já entrega UF/RazaoSocial categóricas
+                self.df_enriquecido = pd.read_csv(
+                    self.arquivo_entrada,
+                    sep=';',
+                    encoding='utf-8',
+                    engine='pyarrow',
+                    usecols=list(tipos),
+                    dtype=tipos
+                )
             print(f"  ✓ {len(self.df_enriquecido):,} registros carregados")
             logger.info(f"Dados carregados: {len(self.df_enriquecido)} registros")
         
@@ -89,6 +127,22 @@ class AgregadorDados:
             logger.error(f"Erro ao carregar dados: {e}")
             raise
     
+    @staticmethod
+    def _preencher_nulos(serie: pd.Series, valor: str) -> pd.Series:
+        """
+        Preenche nulos, incluindo o valor nas categorias se necessário.
+        
+        Args:
+            serie: Coluna (categórica ou não) a preencher
+            valor: Valor usado no lugar dos nulos
+        
+        Returns:
+            Coluna sem nulos
+        """
+        if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+            serie = serie.cat.add_categories([valor])
+        return serie.fillna(valor)
+    
     def preparar_dados(self) -> None:
         """
         Prepara dados para agregação.
@@ -102,18 +156,33 @@ class AgregadorDados:
         
         tamanho_original = len(self.df_enriquecido)
         
-        # Converter ValorDespesas para numérico
-        self.df_enriquecido['ValorDespesas'] = pd.to_numeric(
-            self.df_enriquecido['ValorDespesas'],
-            errors='coerce'
-        )
-        
-        # Remover registros com valor nulo ou negativo
+        # Converter ValorDespesas e Ano/Trimestre (chaves do agrupamento)
+        # para numérico; colunas já numéricas não precisam de nova cópia
+        for campo in ['ValorDespesas', 'Ano', 'Trimestre']:
+            if not pd.api.types.is_numeric_dtype(self.df_enriquecido[campo]):
+                self.df_enriquecido[campo] = pd.to_numeric(
+                    self.df_enriquecido[campo],
+                    errors='coerce'
+                )
+        
+        # Remover registros com valor nulo ou negativo, ou sem período
+        # (registros sem Ano/Trimestre já eram ignorados pelo groupby)
         self.df_enriquecido = self.df_enriquecido[
             (self.df_enriquecido['ValorDespesas'].notna()) &
-            (self.df_enriquecido['ValorDespesas'] >= 0)
+            (self.df_enriquecido['ValorDespesas'] >= 0) &
+            (self.df_enriquecido['Ano'].notna()) &
+            (self.df_enriquecido['Trimestre'].notna())
         ].copy()
         
+        # Tipos inteiros estreitos: chaves menores deixam a tabela hash
+        # do groupby mais compacta (o menor inteiro que comporta os valores;
+        # valores fracionários mantêm float64)
+        for campo in ['Ano', 'Trimestre']:
+            self.df_enriquecido[campo] = pd.to_numeric(
+                self.df_enriquecido[campo],
+                downcast='integer'
+            )
+        
         registros_removidos = tamanho_original - len(self.df_enriquecido)
         
         if registros_removidos > 0:
@@ -124,14 +193,18 @@ class AgregadorDados:
         if 'UF' in self.df_enriquecido.columns:
             uf_nulos = self.df_enriquecido['UF'].isna().sum()
             if uf_nulos > 0:
-                self.df_enriquecido['UF'] = self.df_enriquecido['UF'].fillna('NÃO_INFORMADO')
+                self.df_enriquecido['UF'] = self._preencher_nulos(
+                    self.df_enriquecido['UF'], 'NÃO_INFORMADO'
+                )
                 print(f"  ⚠️  {uf_nulos:,} UFs nulas preenchidas com 'NÃO_INFORMADO'")
         
         # Tratar RazaoSocial nulo
         if 'RazaoSocial' in self.df_enriquecido.columns:
             razao_nulos = self.df_enriquecido['RazaoSocial'].isna().sum()
             if razao_nulos > 0:
-                self.df_enriquecido['RazaoSocial'] = self.df_enriquecido['RazaoSocial'].fillna('NÃO_INFORMADO')
+                self.df_enriquecido['RazaoSocial'] = self._preencher_nulos(
+                    self.df_enriquecido['RazaoSocial'], 'NÃO_INFORMADO'
+                )
                 print(f"  ⚠️  {razao_nulos:,} Razões Sociais nulas preenchidas")
         
         print(f"  ✓ Dados preparados: {len(self.df_enriquecido):,} registros válidos")
@@ -161,18 +234,20 @@ class AgregadorDados:
         
         # Agregar primeiro por trimestre para evitar vieses por quantidade de linhas
         print(f"  Agrupando por: {', '.join(campos_agrupamento)} e trimestre")
-        df_trimestres = (
+        # Series com MultiIndex: o segundo groupby usa os níveis do índice
+        # diretamente, sem materializar um DataFrame intermediário
+        despesas_trimestre = (
             self.df_enriquecido
-            .groupby(['RazaoSocial', 'UF', 'Ano', 'Trimestre'])['ValorDespesas']
+            .groupby(['RazaoSocial', 'UF', 'Ano', 'Trimestre'], sort=False, observed=True)
+            ['ValorDespesas']
             .sum()
-            .reset_index()
         )
 
-        self.df_agregado = df_trimestres.groupby(campos_agrupamento).agg(
-            TotalDespesas=('ValorDespesas', 'sum'),
-            MediaDespesas=('ValorDespesas', 'mean'),
-            DesvioPadrao=('ValorDespesas', 'std'),
-            NumeroTrimestres=('ValorDespesas', 'count'),
+        self.df_agregado = despesas_trimestre.groupby(level=campos_agrupamento).agg(
+            TotalDespesas='sum',
+            MediaDespesas='mean',
+            DesvioPadrao='std',
+            NumeroTrimestres='count',
         ).reset_index()
 
         # Média por trimestre (equivalente à média de trimestres agregados)
@@ -198,21 +273,25 @@ class AgregadorDados:
         """
         Ordena dados por TotalDespesas (maior para menor).
         
-        Decisão Técnica: QuickSort (padrão Pandas)
+        Decisão Técnica: Argsort estável (NumPy) + take
         - Complexidade: O(n log n)
         - Performance adequada para ~1.500 registros
-        - In-place quando possível
+        - Ordena apenas o array de totais; o DataFrame é reordenado uma vez
         """
         print(f"\n🔃 Ordenando dados...")
         logger.info("Ordenando por TotalDespesas")
         
-        self.df_agregado = self.df_agregado.sort_values(
-            'TotalDespesas',
-            ascending=False
-        ).reset_index(drop=True)
+        # Ordem decrescente via argsort estável sobre o array negado
+        ordem = np.argsort(
+            -self.df_agregado['TotalDespesas'].to_numpy(),
+            kind='stable'
+        )
+        self.df_agregado = self.df_agregado.take(ordem)
         
         # Adicionar ranking
-        self.df_agregado['Ranking'] = range(1, len(self.df_agregado) + 1)
+        self.df_agregado['Ranking'] = np.arange(
+            1, len(self.df_agregado) + 1, dtype=np.int32
+        )
         
         # Reordenar colunas
         colunas_ordenadas = [
@@ -242,14 +321,21 @@ class AgregadorDados:
         """
         print(f"\n📈 Gerando análise estatística...")
         
+        # Reduções direto no array NumPy (sem NaN após a agregação),
+        # evitando o overhead de checagem de nulos do pandas a cada chamada
+        # Sem grupos (ou com um só, no desvio) as reduções ficam NaN, como no
+        # pandas, em vez de falhar (min/max) ou emitir avisos do NumPy
+        totais = self.df_agregado['TotalDespesas'].to_numpy(dtype=np.float64)
+        vazio = totais.size == 0
+        
         estatisticas = {
             'total_grupos': len(self.df_agregado),
-            'soma_total_despesas': self.df_agregado['TotalDespesas'].sum(),
-            'media_total_despesas': self.df_agregado['TotalDespesas'].mean(),
-            'mediana_total_despesas': self.df_agregado['TotalDespesas'].median(),
-            'min_total_despesas': self.df_agregado['TotalDespesas'].min(),
-            'max_total_despesas': self.df_agregado['TotalDespesas'].max(),
-            'desvio_total_despesas': self.df_agregado['TotalDespesas'].std(),
+            'soma_total_despesas': totais.sum(),
+            'media_total_despesas': np.nan if vazio else totais.mean(),
+            'mediana_total_despesas': np.nan if vazio else np.median(totais),
+            'min_total_despesas': np.nan if vazio else totais.min(),
+            'max_total_despesas': np.nan if vazio else totais.max(),
+            'desvio_total_despesas': totais.std(ddof=1) if totais.size > 1 else np.nan,
             'grupos_alta_variabilidade': self.df_agregado['AltaVariabilidade'].sum(),
             'ufs_unicas': self.df_agregado['UF'].nunique()
         }
@@ -300,12 +386,16 @@ class AgregadorDados:
         print(f"  Desvio Padrão: R$ {estatisticas['desvio_total_despesas']:,.2f}")
         
         print(f"\n🏆 Top 10 Operadoras (Maior Total de Despesas):")
-        for item in estatisticas['top_10']:
-            print(f"  {item['Ranking']}º. {item['RazaoSocial'][:40]:<40} ({item['UF']}) - R$ {item['TotalDespesas']:,.2f}")
+        print("\n".join(
+            f"  {item['Ranking']}º. {item['RazaoSocial'][:40]:<40} ({item['UF']}) - R$ {item['TotalDespesas']:,.2f}"
+            for item in estatisticas['top_10']
+        ))
         
         print(f"\n🗺️  Top 5 UFs (Maior Total de Despesas):")
-        for i, (uf, total) in enumerate(estatisticas['top_5_ufs'].items(), 1):
-            print(f"  {i}º. {uf} - R$ {total:,.2f}")
+        print("\n".join(
+            f"  {i}º. {uf} - R$ {total:,.2f}"
+            for i, (uf, total) in enumerate(estatisticas['top_5_ufs'].items(), 1)
+        ))
         
         print(f"\n📉 Variabilidade de Despesas:")
         print(f"  Baixa variabilidade (CV < 25%): {estatisticas['distribuicao_variabilidade']['baixa']:,}")
@@ -322,39 +412,44 @@ class AgregadorDados:
         """
         print(f"\n📄 Gerando relatório...")
         
-        with open(arquivo_saida, 'w', encoding='utf-8') as f:
-            f.write("="*70 + "\n")
-            f.write("RELATÓRIO DE AGREGAÇÃO E ESTATÍSTICAS - ETAPA 2.3\n")
-            f.write("="*70 + "\n\n")
-            f.write(f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-            
-            f.write("ESTATÍSTICAS GERAIS:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"Total de grupos (Operadora/UF): {estatisticas['total_grupos']:,}\n")
-            f.write(f"UFs únicas: {estatisticas['ufs_unicas']}\n")
-            f.write(f"Soma total de despesas: R$ {estatisticas['soma_total_despesas']:,.2f}\n\n")
-            
-            f.write("MÉTRICAS DE DESPESAS:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"Média: R$ {estatisticas['media_total_despesas']:,.2f}\n")
-            f.write(f"Mediana: R$ {estatisticas['mediana_total_despesas']:,.2f}\n")
-            f.write(f"Mínimo: R$ {estatisticas['min_total_despesas']:,.2f}\n")
-            f.write(f"Máximo: R$ {estatisticas['max_total_despesas']:,.2f}\n")
-            f.write(f"Desvio Padrão: R$ {estatisticas['desvio_total_despesas']:,.2f}\n\n")
-            
-            f.write("TOP 10 OPERADORAS:\n")
-            f.write("-" * 70 + "\n")
-            for item in estatisticas['top_10']:
-                f.write(f"{item['Ranking']}º. {item['RazaoSocial']} ({item['UF']}) - R$ {item['TotalDespesas']:,.2f}\n")
-            f.write("\n")
-            
-            f.write("TOP 5 UFS:\n")
-            f.write("-" * 70 + "\n")
-            for i, (uf, total) in enumerate(estatisticas['top_5_ufs'].items(), 1):
-                f.write(f"{i}º. {uf} - R$ {total:,.2f}\n")
-            f.write("\n")
-            
-            f.write("="*70 + "\n")
+        # Monta o relatório inteiro em memória e grava com uma única escrita
+        linhas = [
+            "="*70,
+            "RELATÓRIO DE AGREGAÇÃO E ESTATÍSTICAS - ETAPA 2.3",
+            "="*70,
+            "",
+            f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
+            "",
+            "ESTATÍSTICAS GERAIS:",
+            "-" * 70,
+            f"Total de grupos (Operadora/UF): {estatisticas['total_grupos']:,}",
+            f"UFs únicas: {estatisticas['ufs_unicas']}",
+            f"Soma total de despesas: R$ {estatisticas['soma_total_despesas']:,.2f}",
+            "",
+            "MÉTRICAS DE DESPESAS:",
+            "-" * 70,
+            f"Média: R$ {estatisticas['media_total_despesas']:,.2f}",
+            f"Mediana: R$ {estatisticas['mediana_total_despesas']:,.2f}",
+            f"Mínimo: R$ {estatisticas['min_total_despesas']:,.2f}",
+            f"Máximo: R$ {estatisticas['max_total_despesas']:,.2f}",
+            f"Desvio Padrão: R$ {estatisticas['desvio_total_despesas']:,.2f}",
+            "",
+            "TOP 10 OPERADORAS:",
+            "-" * 70,
+        ]
+        linhas.extend(
+            f"{item['Ranking']}º. {item['RazaoSocial']} ({item['UF']}) - R$ {item['TotalDespesas']:,.2f}"
+            for item in estatisticas['top_10']
+        )
+        linhas += ["", "TOP 5 UFS:", "-" * 70]
+        linhas.extend(
+            f"{i}º. {uf} - R$ {total:,.2f}"
+            for i, (uf, total) in enumerate(estatisticas['top_5_ufs'].items(), 1)
+        )
+        linhas += ["", "="*70, ""]
+        
+        with open(arquivo_saida, 'w', encoding='utf-8', buffering=-1) as f:
+            f.write("\n".join(linhas))
         
         print(f"  ✓ Relatório salvo em: {arquivo_saida}")
         logger.info(f"Relatório gerado: {arquivo_saida}")
@@ -390,7 +485,9 @@ class AgregadorDados:
         """
         print(f"\n🗜️  Compactando arquivo final...")
         
-        with zipfile.ZipFile(arquivo_zip, 'w', zipfile.ZIP_DEFLATED) as zf:
+        # Nível 1: CSV muito repetitivo, níveis maiores quase não reduzem
+        # o tamanho e custam ~3x mais tempo de compressão
+        with zipfile.ZipFile(arquivo_zip, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
             zf.write(arquivo_csv, arquivo_csv.name)
         
         tamanho_csv = arquivo_csv.stat().st_size
@@ -414,7 +511,7 @@ def main():
     try:
         # Caminhos
         saida_dir = PROJETO_RAIZ / "output"
-        arquivo_entrada = saida_dir / "dados_enriquecidos.csv"
+        arquivo_entrada = saida_dir / "dados_enriquecidos.parquet"
         arquivo_saida_csv = saida_dir / "despesas_agregadas.csv"
         arquivo_saida_zip = saida_dir / "Teste_Douglas_Ribeiro.zip"
         arquivo_relatorio = saida_dir / "relatorio_agregacao.txt"
@@ -27,9 +27,19 @@ Uso:
 """
 
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import requests
 import sys
+import codecs
+import csv
+import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Optional
 from datetime import datetime
 import logging
 import re
@@ -40,7 +50,6 @@ if str(PROJETO_RAIZ) not in sys.path:
 
 from integracao_api.utils import (
     configurar_logging,
-    limpar_cnpj,
     URL_ANS_OPERADORAS,
     bytes_para_humano
 )
@@ -49,6 +58,84 @@ from integracao_api.utils import (
 # Configuração de logging
 logger = configurar_logging("enriquecimento.log")
 
+# Nomes possíveis da coluna de CNPJ nos arquivos lidos (lida sempre como texto
+# para preservar zeros à esquerda)
+COLUNAS_CNPJ = ['CNPJ', 'cnpj', 'CD_CNPJ', 'cd_cnpj']
+
+# Schema conhecido de dados_validados.csv: declarado na leitura para evitar a
+# inferência de tipos e para que blocos lidos em streaming tenham sempre o
+# mesmo tipo (mesmo com colunas vazias no 1º bloco)
+FLAGS_VALIDACAO = [
+    'cnpj_formato_valido', 'cnpj_digitos_validos', 'cnpj_valido',
+    'valor_nulo', 'valor_negativo', 'valor_zerado', 'valor_valido',
+    'razao_vazia', 'razao_muito_curta', 'razao_valida',
+    'trimestre_valido', 'ano_valido',
+]
+TIPOS_DESPESAS = {
+    'RazaoSocial': pa.string(),
+    # float64: a validação mantém (só marca) trimestres/anos fora da faixa ou
+    # fracionários; o estreitamento para inteiro fica na agregação
+    'Trimestre': pa.float64(),
+    'Ano': pa.float64(),
+    'ValorDespesas': pa.float64(),
+    'motivo_cnpj_invalido': pa.string(),
+    **{flag: pa.bool_() for flag in FLAGS_VALIDACAO},
+}
+
+# Tipos das colunas do cadastro após a limpeza: aceitam nulo sem mudar de
+# dtype, então todo bloco enriquecido gera o mesmo schema. Modalidade e UF
+# têm poucos valores distintos: categóricas ocupam 1 byte por linha após o
+# join e viram colunas dicionário no Parquet
+TIPOS_CADASTRO = {
+    'RegistroANS': 'Int64',
+    'Modalidade': 'category',
+    'UF': 'category',
+}
+
+# Chave numérica atribuída a CNPJs fora do formato de 14 dígitos; é maior que
+# qualquer CNPJ válido, portanto nunca encontra correspondência no cadastro
+CHAVE_CNPJ_INVALIDA = np.iinfo(np.uint64).max
+
+# Links para o relatório cadastral na listagem HTML da ANS (compilado uma vez;
+# em bytes porque a listagem é lida linha a linha sem decodificar)
+_PADRAO_CADOP = re.compile(rb'href="(Relatorio_cadop[^"]*\.csv)"', re.IGNORECASE)
+
+# Opções da cópia CSV dos dados enriquecidos: '\n' fixo (sem '\r\n' no
+# Windows) e escrita em lotes de linhas, sem montar um texto único enorme
+OPCOES_CSV_SAIDA = {
+    'sep': ';',
+    'encoding': 'utf-8',
+    'index': False,
+    'lineterminator': '\n',
+    'chunksize': 200_000,
+}
+
+# Nomes (em minúsculas) das colunas do cadastro ANS e o nome usado no join;
+# só as colunas necessárias são lidas do CSV
+MAPEAMENTO_COLUNAS_CADASTRO = {
+    'cnpj': 'CNPJ',
+    'cd_cnpj': 'CNPJ',
+    'registro_ans': 'RegistroANS',
+    'cd_registro_ans': 'RegistroANS',
+    'registro_operadora': 'RegistroANS',
+    'registro_operadora_ans': 'RegistroANS',
+    'razao_social': 'RazaoSocialCadastro',
+    'nm_razao_social': 'RazaoSocialCadastro',
+    'modalidade': 'Modalidade',
+    'ds_modalidade': 'Modalidade',
+    'sg_modalidade': 'Modalidade',
+    'uf': 'UF',
+    'sg_uf': 'UF'
+}
+COLUNAS_CADASTRO = ['CNPJ', 'RegistroANS', 'Modalidade', 'UF']
+
+# Cadastro baixado (CSV, também usado pela API e pelos scripts SQL) e cache do
+# cadastro já limpo em Parquet, válido enquanto o Last-Modified do arquivo na
+# ANS for o mesmo gravado no sidecar
+ARQUIVO_CADASTRO = PROJETO_RAIZ / "data" / "cadastro_operadoras.csv"
+CACHE_CADASTRO = PROJETO_RAIZ / "data" / "cadastro_operadoras.parquet"
+CACHE_CADASTRO_LAST_MODIFIED = PROJETO_RAIZ / "data" / "cadastro_operadoras.last_modified"
+
 
 class EnriquecedorDados:
     """
@@ -71,24 +158,199 @@ class EnriquecedorDados:
         self.arquivo_entrada = arquivo_entrada
         self.df_despesas = None
         self.df_cadastro = None
+        self.cadastro_por_chave = None
+        self.last_modified_cadastro = None
         self.df_enriquecido = None
+        self.resumo = None
         
         logger.info("="*70)
         logger.info("INICIANDO ETAPA 2.2: ENRIQUECIMENTO DE DADOS")
         logger.info("="*70)
     
+    @staticmethod
+    def _detectar_encoding(caminho: Path, tamanho_amostra: int = 4096) -> str:
+        """
+        Detecta o encoding do arquivo pelos primeiros bytes.
+        
+        Args:
+            caminho: Path do arquivo
+            tamanho_amostra: Quantidade de bytes analisados
+        
+        Returns:
+            'utf-8' se a amostra for UTF-8 válido, senão 'latin-1'
+        """
+        with open(caminho, 'rb') as f:
+            amostra = f.read(tamanho_amostra)
+        
+        # Decoder incremental: não falha se a amostra cortar um caractere
+        # multibyte no final
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            return 'latin-1'
+    
+    @staticmethod
+    @contextmanager
+    def _liberar_page_cache(caminho: Path):
+        """
+        Libera do page cache as páginas de um arquivo grande lido uma única vez.
+        
+        Ao final da leitura pede DONTNEED para o arquivo, para que o CSV de
+        despesas não expulse do cache o cadastro e a saída. Ao contrário de
+        SEQUENTIAL (que só vale para o descritor em que é chamado), descartar
+        páginas limpas vale para o arquivo, então funciona mesmo com o leitor
+        do PyArrow abrindo o arquivo por conta própria. Em sistemas sem
+        posix_fadvise (Windows, macOS) não faz nada.
+        
+        Args:
+            caminho: Path do arquivo lido
+        """
+        try:
+            yield
+        finally:
+            # Só uma dica: falha aqui (ex.: arquivo inexistente) não pode
+            # mascarar o erro original da leitura
+            if hasattr(os, 'posix_fadvise'):
+                try:
+                    fd = os.open(caminho, os.O_RDONLY)
+                    try:
+                        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                    finally:
+                        os.close(fd)
+                except OSError:
+                    pass
+    
+    @staticmethod
+    def _colunas_cadastro(caminho: Path, encoding: str) -> list:
+        """
+        Lê o cabeçalho do cadastro e seleciona as colunas usadas no join.
+        
+        Args:
+            caminho: Path do CSV cadastral
+            encoding: Encoding do arquivo
+        
+        Returns:
+            Nomes originais das colunas que mapeiam para COLUNAS_CADASTRO
+        """
+        # utf-8-sig: o leitor do PyArrow descarta o BOM, então o nome da 1ª
+        # coluna precisa vir sem ele
+        encoding = 'utf-8-sig' if encoding == 'utf-8' else encoding
+        with open(caminho, 'r', encoding=encoding, newline='') as f:
+            cabecalho = next(csv.reader(f, delimiter=';'), [])
+        
+        return [
+            nome for nome in cabecalho
+            if MAPEAMENTO_COLUNAS_CADASTRO.get(nome.strip().lower()) in COLUNAS_CADASTRO
+        ]
+    
+    @staticmethod
+    def _opcoes_csv(
+        encoding: str = 'utf-8',
+        tamanho_bloco: int = 64 << 20,
+        colunas: Optional[list] = None,
+        somente_texto: bool = False
+    ) -> dict:
+        """
+        Opções do leitor CSV do PyArrow (arquivos separados por ';'), com os
+        tipos declarados para CNPJ (texto) e para o schema das despesas.
+        
+        Args:
+            encoding: Encoding do arquivo
+            tamanho_bloco: Tamanho (bytes) de cada bloco lido
+            colunas: Colunas a ler (None = todas); as demais nem são convertidas
+            somente_texto: Declara todas as `colunas` como texto (UTF-8
+                inválido gera erro em vez de virar coluna binária)
+        
+        Returns:
+            Dicionário com read_options, parse_options e convert_options
+        """
+        tipos = {coluna: pa.string() for coluna in COLUNAS_CNPJ}
+        tipos.update(TIPOS_DESPESAS)
+        if somente_texto and colunas:
+            tipos.update({coluna: pa.string() for coluna in colunas})
+        return {
+            'read_options': pacsv.ReadOptions(
+                encoding=encoding,
+                block_size=tamanho_bloco,
+                use_threads=True
+            ),
+            'parse_options': pacsv.ParseOptions(delimiter=';'),
+            'convert_options': pacsv.ConvertOptions(
+                column_types=tipos,
+                strings_can_be_null=True,
+                include_columns=colunas
+            ),
+        }
+    
+    @classmethod
+    def _ler_csv(
+        cls,
+        caminho: Path,
+        encoding: str = 'utf-8',
+        colunas: Optional[list] = None,
+        somente_texto: bool = False
+    ) -> pd.DataFrame:
+        """
+        Lê CSV separado por ';' com o parser multithread do PyArrow.
+        
+        Args:
+            caminho: Path do arquivo CSV
+            encoding: Encoding do arquivo
+            colunas: Colunas a ler (None = todas)
+            somente_texto: Lê todas as `colunas` como texto
+        
+        Returns:
+            DataFrame com os dados do arquivo
+        """
+        opcoes = cls._opcoes_csv(encoding, colunas=colunas, somente_texto=somente_texto)
+        tabela = pacsv.read_csv(caminho, **opcoes)
+        # Libera a memória do Arrow conforme o DataFrame é montado
+        return tabela.to_pandas(self_destruct=True, split_blocks=True)
+    
+    @staticmethod
+    def limpar_cnpjs(cnpjs: pd.Series) -> pd.Series:
+        """
+        Remove formatação de uma coluna de CNPJs, deixando apenas números.
+        
+        Equivalente vetorizado de `limpar_cnpj`: a regex roda em C sobre a
+        coluna inteira, sem chamar uma função Python por linha.
+        
+        Args:
+            cnpjs: Série com CNPJs formatados ou não
+        
+        Returns:
+            Série com CNPJs apenas com números (nulos permanecem nulos)
+        """
+        return cnpjs.astype(str).str.replace(r'\D+', '', regex=True)
+    
+    @staticmethod
+    def chave_cnpj(cnpjs: pd.Series) -> np.ndarray:
+        """
+        Converte CNPJs limpos em chave inteira (uint64) para o join.
+        
+        Hash de inteiros é bem mais barato que hash de strings no merge;
+        14 dígitos cabem com folga em 64 bits.
+        
+        Args:
+            cnpjs: Série com CNPJs apenas com números
+        
+        Returns:
+            Array uint64 (CHAVE_CNPJ_INVALIDA onde o CNPJ não tem 14 dígitos)
+        """
+        formato_valido = cnpjs.str.fullmatch(r'\d{14}').fillna(False).to_numpy(dtype=bool)
+        chave = np.full(len(cnpjs), CHAVE_CNPJ_INVALIDA, dtype=np.uint64)
+        chave[formato_valido] = cnpjs[formato_valido].astype('uint64').to_numpy()
+        return chave
+    
     def carregar_despesas(self) -> None:
         """Carrega dados de despesas validados."""
         print(f"📥 Carregando dados de despesas...")
         logger.info(f"Carregando: {self.arquivo_entrada}")
         
         try:
-            self.df_despesas = pd.read_csv(
-                self.arquivo_entrada,
-                sep=';',
-                encoding='utf-8',
-                low_memory=False
-            )
+            with self._liberar_page_cache(self.arquivo_entrada):
+                self.df_despesas = self._ler_csv(self.arquivo_entrada)
             print(f"  ✓ {len(self.df_despesas):,} registros carregados")
             logger.info(f"Despesas carregadas: {len(self.df_despesas)} registros")
         
@@ -101,7 +363,8 @@ class EnriquecedorDados:
         Baixa arquivo CSV de dados cadastrais da ANS.
         
         Returns:
-            Path do arquivo baixado
+            Path do arquivo baixado, ou do cache Parquet quando o arquivo
+            na ANS não mudou desde o último download
         
         Nota:
             A URL exata pode variar. Este código busca o arquivo mais recente.
@@ -113,47 +376,69 @@ class EnriquecedorDados:
             # URL base do FTP da ANS
             url_base = "https://dadosabertos.ans.gov.br/FTP/PDA/operadoras_de_plano_de_saude_ativas/"
             
-            # Fazer requisição para listar arquivos
-            resposta = requests.get(url_base, timeout=30)
-            resposta.raise_for_status()
-            
-            # Procurar arquivo CSV mais recente
-            padrao = r'href="(Relatorio_cadop[^"]*\.csv)"'
-            arquivos = re.findall(padrao, resposta.text, re.IGNORECASE)
+            # Listar arquivos lendo o HTML linha a linha (sem carregar o
+            # corpo inteiro em memória)
+            arquivos = []
+            with requests.get(url_base, stream=True, timeout=30) as resposta:
+                resposta.raise_for_status()
+                for linha in resposta.iter_lines():
+                    arquivos.extend(nome.decode() for nome in _PADRAO_CADOP.findall(linha))
             
             if not arquivos:
                 raise Exception("Nenhum arquivo cadastral encontrado na ANS")
             
-            # Usar o arquivo mais recente (geralmente o último da lista)
-            nome_arquivo = arquivos[-1]
+            # Usar o arquivo mais recente (maior nome em ordem lexicográfica,
+            # sem depender da ordem da listagem)
+            nome_arquivo = max(arquivos)
             url_arquivo = url_base + nome_arquivo
             
             print(f"  Arquivo encontrado: {nome_arquivo}")
             logger.info(f"Arquivo cadastral: {nome_arquivo}")
             
+            # HEAD para comparar o Last-Modified com o do cache: se o arquivo
+            # não mudou, pula download e parse do CSV
+            resposta_head = requests.head(url_arquivo, timeout=30, allow_redirects=True)
+            ultima_modificacao = resposta_head.headers.get('Last-Modified') if resposta_head.ok else None
+            
+            if ultima_modificacao and self._cache_cadastro_valido(ultima_modificacao):
+                print(f"  ✓ Cadastro sem alterações ({ultima_modificacao}), usando cache")
+                logger.info(f"Cache do cadastro reaproveitado: {CACHE_CADASTRO}")
+                return CACHE_CADASTRO
+            
+            self.last_modified_cadastro = ultima_modificacao
+            
             # Baixar arquivo
             print(f"  Baixando...")
             resposta_arquivo = requests.get(url_arquivo, stream=True, timeout=300)
             resposta_arquivo.raise_for_status()
             
             # Salvar localmente
-            caminho_local = PROJETO_RAIZ / "data" / "cadastro_operadoras.csv"
+            caminho_local = ARQUIVO_CADASTRO
             caminho_local.parent.mkdir(parents=True, exist_ok=True)
             
             tamanho_total = int(resposta_arquivo.headers.get('content-length', 0))
             
+            def exibir_progresso(tamanho_baixado: int) -> None:
+                percentual = (tamanho_baixado / tamanho_total) * 100
+                barra = '█' * int(percentual // 2) + '░' * (50 - int(percentual // 2))
+                print(f"\r  |{barra}| {percentual:.1f}%", end='')
+            
+            # Blocos de 1 MB e barra redesenhada no máximo a cada 0,25s:
+            # menos iterações em Python e escritas em disco maiores
             with open(caminho_local, 'wb') as f:
                 tamanho_baixado = 0
-                for chunk in resposta_arquivo.iter_content(chunk_size=8192):
+                proxima_exibicao = time.monotonic()
+                for chunk in resposta_arquivo.iter_content(chunk_size=1 << 20):
                     if chunk:
                         f.write(chunk)
                         tamanho_baixado += len(chunk)
                         
-                        if tamanho_total > 0:
-                            percentual = (tamanho_baixado / tamanho_total) * 100
-                            barra = '█' * int(percentual // 2) + '░' * (50 - int(percentual // 2))
-                            print(f"\r  |{barra}| {percentual:.1f}%", end='')
+                        if tamanho_total > 0 and time.monotonic() >= proxima_exibicao:
+                            exibir_progresso(tamanho_baixado)
+                            proxima_exibicao = time.monotonic() + 0.25
             
+            if tamanho_total > 0:
+                exibir_progresso(tamanho_baixado)
             print()  # Nova linha
             print(f"  ✓ Download concluído: {bytes_para_humano(tamanho_baixado)}")
             logger.info(f"Arquivo cadastral baixado: {caminho_local}")
@@ -174,22 +459,32 @@ class EnriquecedorDados:
         print(f"\n📋 Processando dados cadastrais...")
         logger.info(f"Carregando cadastro de: {caminho}")
         
+        # Cache Parquet: cadastro já limpo, normalizado e sem duplicatas
+        if caminho.suffix == '.parquet':
+            self.df_cadastro = pd.read_parquet(caminho)
+            self._indexar_cadastro()
+            print(f"  ✓ {len(self.df_cadastro):,} operadoras únicas (cache)")
+            logger.info(f"Cadastro carregado do cache: {len(self.df_cadastro)} operadoras")
+            return
+        
         try:
-            # Tentar diferentes encodings
-            for encoding in ['utf-8', 'latin-1', 'iso-8859-1']:
+            # A amostra pode ser ASCII num arquivo latin-1: colunas lidas como
+            # texto fazem o UTF-8 inválido falhar e a leitura é refeita
+            encoding = self._detectar_encoding(caminho)
+            for encoding in dict.fromkeys([encoding, 'latin-1']):
                 try:
-                    self.df_cadastro = pd.read_csv(
+                    self.df_cadastro = self._ler_csv(
                         caminho,
-                        sep=';',
                         encoding=encoding,
-                        low_memory=False
+                        colunas=self._colunas_cadastro(caminho, encoding),
+                        somente_texto=True
                     )
                     break
-                except UnicodeDecodeError:
-                    continue
-            
-            if self.df_cadastro is None:
-                raise Exception("Não foi possível ler o arquivo cadastral")
+                except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+                    if encoding == 'latin-1':
+                        raise
+                    logger.warning(f"Cadastro não é {encoding} válido ({e}); tentando latin-1")
+            logger.info(f"Encoding do cadastro: {encoding}")
             
             print(f"  ✓ {len(self.df_cadastro):,} operadoras no cadastro")
             logger.info(f"Cadastro carregado: {len(self.df_cadastro)} operadoras")
@@ -197,41 +492,29 @@ class EnriquecedorDados:
             # Normalizar nomes de colunas
             self.df_cadastro.columns = self.df_cadastro.columns.str.strip().str.lower()
             
-            # Identificar colunas necessárias (nomes podem variar)
-            mapeamento_colunas = {
-                'cnpj': 'CNPJ',
-                'cd_cnpj': 'CNPJ',
-                'registro_ans': 'RegistroANS',
-                'cd_registro_ans': 'RegistroANS',
-                'registro_operadora': 'RegistroANS',
-                'registro_operadora_ans': 'RegistroANS',
-                'razao_social': 'RazaoSocialCadastro',
-                'nm_razao_social': 'RazaoSocialCadastro',
-                'modalidade': 'Modalidade',
-                'ds_modalidade': 'Modalidade',
-                'sg_modalidade': 'Modalidade',
-                'uf': 'UF',
-                'sg_uf': 'UF'
-            }
-            
-            self.df_cadastro = self.df_cadastro.rename(columns=mapeamento_colunas)
+            # Padronizar nomes (variam entre versões do arquivo)
+            self.df_cadastro = self.df_cadastro.rename(columns=MAPEAMENTO_COLUNAS_CADASTRO)
             
             # Selecionar colunas necessárias
-            colunas_necessarias = ['CNPJ', 'RegistroANS', 'Modalidade', 'UF']
-            colunas_disponiveis = [col for col in colunas_necessarias if col in self.df_cadastro.columns]
+            colunas_disponiveis = [col for col in COLUNAS_CADASTRO if col in self.df_cadastro.columns]
             
             if 'CNPJ' not in colunas_disponiveis:
                 raise Exception("Coluna CNPJ não encontrada no cadastro!")
             
-            self.df_cadastro = self.df_cadastro[colunas_disponiveis].copy()
+            self.df_cadastro = self.df_cadastro[colunas_disponiveis]
+            self.df_cadastro = self.df_cadastro.astype({
+                coluna: tipo
+                for coluna, tipo in TIPOS_CADASTRO.items()
+                if coluna in colunas_disponiveis
+            })
             
-            # Limpar CNPJs
-            self.df_cadastro['CNPJ'] = self.df_cadastro['CNPJ'].astype(str).apply(limpar_cnpj)
+            # Limpar CNPJs (vetorizado)
+            self.df_cadastro['CNPJ'] = self.limpar_cnpjs(self.df_cadastro['CNPJ'])
             
             # Remover registros com CNPJ inválido
             self.df_cadastro = self.df_cadastro[
                 self.df_cadastro['CNPJ'].str.len() == 14
-            ].copy()
+            ]
             
             # Remover duplicatas de CNPJ (manter primeiro registro)
             duplicados_antes = len(self.df_cadastro)
@@ -242,6 +525,8 @@ class EnriquecedorDados:
                 print(f"  ⚠️  {duplicados_removidos} CNPJs duplicados removidos")
                 logger.warning(f"CNPJs duplicados removidos: {duplicados_removidos}")
             
+            self._indexar_cadastro()
+            
             print(f"  ✓ {len(self.df_cadastro):,} operadoras únicas após limpeza")
             print(f"  ✓ Colunas disponíveis: {', '.join(colunas_disponiveis)}")
             
@@ -249,46 +534,130 @@ class EnriquecedorDados:
             logger.error(f"Erro ao processar cadastro: {e}")
             raise
     
-    def realizar_join(self) -> None:
+    def _indexar_cadastro(self) -> None:
         """
-        Realiza LEFT JOIN entre despesas e cadastro.
+        Monta a tabela de busca do join: colunas do cadastro indexadas pela
+        chave inteira do CNPJ (montada uma vez, reaproveitada por bloco).
+        """
+        self.cadastro_por_chave = (
+            self.df_cadastro
+            .set_index(pd.Index(self.chave_cnpj(self.df_cadastro['CNPJ'])))
+            .drop(columns='CNPJ')
+        )
+    
+    @staticmethod
+    def _cache_cadastro_valido(ultima_modificacao: str) -> bool:
+        """
+        Verifica se o cache Parquet do cadastro corresponde ao arquivo atual.
         
-        Decisão Técnica: Left Join
-        - Mantém todos os registros de despesas
-        - Adiciona informações cadastrais quando disponíveis
-        - Permite identificar CNPJs sem cadastro
+        Args:
+            ultima_modificacao: Header Last-Modified do arquivo na ANS
+        
+        Returns:
+            True se o cache (e o CSV usado pela API/SQL) existe e foi gerado
+            a partir do mesmo Last-Modified
         """
-        print(f"\n🔗 Realizando join dos dados...")
-        logger.info("Iniciando join LEFT entre despesas e cadastro")
+        if not (CACHE_CADASTRO.exists() and ARQUIVO_CADASTRO.exists()):
+            return False
+        if not CACHE_CADASTRO_LAST_MODIFIED.exists():
+            return False
+        return CACHE_CADASTRO_LAST_MODIFIED.read_text(encoding='utf-8').strip() == ultima_modificacao
+    
+    def salvar_cache_cadastro(self) -> None:
+        """
+        Grava o cadastro limpo em Parquet junto com o Last-Modified do download.
+        
+        Só grava após um download novo com Last-Modified conhecido; o sidecar
+        é escrito depois do Parquet, para nunca apontar para um cache parcial.
+        """
+        if self.last_modified_cadastro is None:
+            return
         
-        # Garantir que CNPJ está limpo em ambos
-        self.df_despesas['CNPJ'] = self.df_despesas['CNPJ'].astype(str).apply(limpar_cnpj)
+        self.df_cadastro.to_parquet(CACHE_CADASTRO, index=False)
+        CACHE_CADASTRO_LAST_MODIFIED.write_text(self.last_modified_cadastro, encoding='utf-8')
+        
+        print(f"  ✓ Cache do cadastro salvo: {CACHE_CADASTRO.name}")
+        logger.info(f"Cache do cadastro salvo: {CACHE_CADASTRO} ({self.last_modified_cadastro})")
+    
+    def _enriquecer(self, despesas: pd.DataFrame) -> pd.DataFrame:
+        """
+        Faz o LEFT JOIN de um conjunto de despesas com o cadastro.
+        
+        Args:
+            despesas: DataFrame de despesas (arquivo inteiro ou um bloco)
         
-        # Realizar Left Join
-        self.df_enriquecido = pd.merge(
-            self.df_despesas,
-            self.df_cadastro,
-            on='CNPJ',
-            how='left',
-            indicator=True  # Adiciona coluna _merge para análise
+        Returns:
+            DataFrame enriquecido com colunas do cadastro e status_match
+        """
+        # CNPJ das despesas já vem só com dígitos da validação (Etapa 2.1);
+        # o que estiver fora do formato de 14 dígitos recebe a chave inválida
+        # e fica sem cadastro, sem uma segunda limpeza por linha
+        # Broadcast hash join: o cadastro (lado pequeno, único por CNPJ) fica
+        # indexado pela chave inteira; cada linha de despesas faz uma única
+        # sondagem na hashtable e as colunas do cadastro são copiadas por
+        # posição (-1 = sem cadastro vira nulo)
+        posicoes = self.cadastro_por_chave.index.get_indexer(
+            self.chave_cnpj(despesas['CNPJ'])
         )
+        enriquecido = despesas.assign(**{
+            coluna: pd.Series(
+                valores.array.take(posicoes, allow_fill=True),
+                index=despesas.index
+            )
+            for coluna, valores in self.cadastro_por_chave.items()
+        })
         
-        # Renomear coluna _merge para mais clareza
-        self.df_enriquecido = self.df_enriquecido.rename(
-            columns={'_merge': 'status_match'}
+        # Status do match direto da sondagem, sem coluna indicadora
+        enriquecido['status_match'] = pd.Categorical.from_codes(
+            (posicoes >= 0).astype('int8'),
+            categories=['SEM_CADASTRO', 'MATCH_CADASTRO']
         )
         
-        # Traduzir status
-        self.df_enriquecido['status_match'] = self.df_enriquecido['status_match'].map({
-            'both': 'MATCH_CADASTRO',
-            'left_only': 'SEM_CADASTRO',
-            'right_only': 'APENAS_CADASTRO'  # Não deve ocorrer em Left Join
-        })
+        return enriquecido
+    
+    def _acumular_resumo(self, enriquecido: pd.DataFrame) -> None:
+        """
+        Acumula as contagens usadas no resumo do join e no relatório.
         
-        # Estatísticas do join
-        total = len(self.df_enriquecido)
-        com_match = (self.df_enriquecido['status_match'] == 'MATCH_CADASTRO').sum()
-        sem_match = (self.df_enriquecido['status_match'] == 'SEM_CADASTRO').sum()
+        Args:
+            enriquecido: DataFrame enriquecido (arquivo inteiro ou um bloco)
+        """
+        # Contagens sem ordenação: só os tops são usados, e eles saem de
+        # nlargest na hora de exibir (sem ordenar todos os CNPJs únicos)
+        sem_cadastro = enriquecido['status_match'] == 'SEM_CADASTRO'
+        parcial = {
+            'cnpjs': enriquecido['CNPJ'].value_counts(sort=False),
+            'cnpjs_sem_cadastro': enriquecido.loc[sem_cadastro, 'CNPJ'].value_counts(sort=False),
+            'status_match': enriquecido['status_match'].value_counts(sort=False),
+        }
+        for coluna in ['UF', 'Modalidade']:
+            if coluna in enriquecido.columns:
+                # Categóricas contam também categorias ausentes (zero)
+                contagem = enriquecido[coluna].value_counts(sort=False)
+                parcial[coluna] = contagem[contagem > 0]
+        
+        if self.resumo is None:
+            self.resumo = {
+                'total': len(enriquecido),
+                'sem_match': int(sem_cadastro.sum()),
+                **parcial
+            }
+            return
+        
+        self.resumo['total'] += len(enriquecido)
+        self.resumo['sem_match'] += int(sem_cadastro.sum())
+        for chave, contagem in parcial.items():
+            self.resumo[chave] = (
+                self.resumo[chave]
+                .add(contagem, fill_value=0)
+                .astype('int64')
+            )
+    
+    def _exibir_resumo_join(self) -> None:
+        """Exibe estatísticas do join e os CNPJs sem cadastro mais frequentes."""
+        total = self.resumo['total']
+        sem_match = self.resumo['sem_match']
+        com_match = total - sem_match
         
         percentual_match = (com_match / total) * 100
         
@@ -302,85 +671,194 @@ class EnriquecedorDados:
         # Listar CNPJs sem match (top 10)
         if sem_match > 0:
             print(f"\n  ⚠️  Top 10 CNPJs sem cadastro:")
-            cnpjs_sem_match = self.df_enriquecido[
-                self.df_enriquecido['status_match'] == 'SEM_CADASTRO'
-            ]['CNPJ'].value_counts().head(10)
+            cnpjs_sem_match = self.resumo['cnpjs_sem_cadastro'].nlargest(10)
             
             for cnpj, qtd in cnpjs_sem_match.items():
                 print(f"    - {cnpj}: {qtd} registro(s)")
     
+    def realizar_join(self) -> None:
+        """
+        Realiza LEFT JOIN entre despesas e cadastro.
+        
+        Decisão Técnica: Left Join
+        - Mantém todos os registros de despesas
+        - Adiciona informações cadastrais quando disponíveis
+        - Permite identificar CNPJs sem cadastro
+        """
+        print(f"\n🔗 Realizando join dos dados...")
+        logger.info("Iniciando join LEFT entre despesas e cadastro")
+        
+        self.df_enriquecido = self._enriquecer(self.df_despesas)
+        self._acumular_resumo(self.df_enriquecido)
+        self._exibir_resumo_join()
+    
+    def processar_stream(
+        self,
+        arquivo_saida: Path,
+        arquivo_csv: Optional[Path] = None,
+        tamanho_bloco: int = 64 << 20
+    ) -> None:
+        """
+        Lê as despesas em blocos, faz o join e grava cada bloco enriquecido.
+        
+        Substitui carregar_despesas + realizar_join + salvar_dados_enriquecidos
+        quando o arquivo de despesas é grande.
+        
+        Decisão Técnica: Processamento em blocos
+        - Só o cadastro (pequeno) e um bloco de despesas ficam em memória
+        - Estatísticas do join são acumuladas bloco a bloco
+        
+        Args:
+            arquivo_saida: Path do arquivo Parquet de saída
+            arquivo_csv: Path de uma cópia em CSV (opcional)
+            tamanho_bloco: Tamanho (bytes) de cada bloco de despesas
+        """
+        print(f"\n🔗 Enriquecendo despesas em blocos...")
+        logger.info(f"Join LEFT em blocos a partir de: {self.arquivo_entrada}")
+        
+        escritor = None
+        blocos = 0
+        
+        with self._liberar_page_cache(self.arquivo_entrada):
+            leitor = pacsv.open_csv(
+                self.arquivo_entrada,
+                **self._opcoes_csv(tamanho_bloco=tamanho_bloco)
+            )
+            
+            try:
+                for lote in leitor:
+                    enriquecido = self._enriquecer(lote.to_pandas(split_blocks=True))
+                    self._acumular_resumo(enriquecido)
+                    
+                    # Blocos seguintes seguem o schema do primeiro
+                    tabela = pa.Table.from_pandas(
+                        enriquecido,
+                        schema=escritor.schema if escritor is not None else None,
+                        preserve_index=False
+                    )
+                    if escritor is None:
+                        escritor = pq.ParquetWriter(arquivo_saida, tabela.schema, compression='zstd')
+                    escritor.write_table(tabela)
+                    
+                    if arquivo_csv is not None:
+                        enriquecido.to_csv(
+                            arquivo_csv,
+                            mode='w' if blocos == 0 else 'a',
+                            header=blocos == 0,
+                            **OPCOES_CSV_SAIDA
+                        )
+                    blocos += 1
+            finally:
+                if escritor is not None:
+                    escritor.close()
+        
+        if escritor is None:
+            raise Exception("Nenhum registro de despesas encontrado")
+        
+        print(f"  ✓ {blocos} bloco(s) processado(s)")
+        self._exibir_resumo_join()
+        
+        tamanho = arquivo_saida.stat().st_size
+        print(f"\n  ✓ Dados salvos: {arquivo_saida.name} ({bytes_para_humano(tamanho)})")
+        logger.info(f"Dados enriquecidos salvos: {arquivo_saida}")
+        
+        if arquivo_csv is not None:
+            tamanho = arquivo_csv.stat().st_size
+            print(f"  ✓ Cópia em CSV: {arquivo_csv.name} ({bytes_para_humano(tamanho)})")
+            logger.info(f"Cópia CSV dos dados enriquecidos salva: {arquivo_csv}")
+    
     def gerar_relatorio_enriquecimento(self, arquivo_saida: Path) -> None:
         """
         Gera relatório detalhado do enriquecimento.
         
+        Usa as contagens acumuladas em realizar_join/processar_stream.
+        
         Args:
             arquivo_saida: Path do arquivo de relatório
         """
         print(f"\n📊 Gerando relatório de enriquecimento...")
         
-        with open(arquivo_saida, 'w', encoding='utf-8') as f:
-            f.write("="*70 + "\n")
-            f.write("RELATÓRIO DE ENRIQUECIMENTO - ETAPA 2.2\n")
-            f.write("="*70 + "\n\n")
-            f.write(f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-            
-            # Estatísticas gerais
-            f.write("ESTATÍSTICAS GERAIS:\n")
-            f.write("-" * 70 + "\n")
-            f.write(f"Total de registros: {len(self.df_enriquecido):,}\n")
-            f.write(f"Operadoras únicas: {self.df_enriquecido['CNPJ'].nunique():,}\n\n")
-            
-            # Match de cadastro
-            f.write("MATCH COM CADASTRO ANS:\n")
-            f.write("-" * 70 + "\n")
-            matches = self.df_enriquecido['status_match'].value_counts()
-            for status, qtd in matches.items():
-                perc = (qtd / len(self.df_enriquecido)) * 100
-                f.write(f"{status}: {qtd:,} ({perc:.1f}%)\n")
-            f.write("\n")
-            
-            # Distribuição por UF
-            if 'UF' in self.df_enriquecido.columns:
-                f.write("DISTRIBUIÇÃO POR UF:\n")
-                f.write("-" * 70 + "\n")
-                dist_uf = self.df_enriquecido['UF'].value_counts().head(10)
-                for uf, qtd in dist_uf.items():
-                    f.write(f"{uf}: {qtd:,}\n")
-                f.write("\n")
-            
-            # Distribuição por Modalidade
-            if 'Modalidade' in self.df_enriquecido.columns:
-                f.write("DISTRIBUIÇÃO POR MODALIDADE:\n")
-                f.write("-" * 70 + "\n")
-                dist_mod = self.df_enriquecido['Modalidade'].value_counts()
-                for mod, qtd in dist_mod.items():
-                    f.write(f"{mod}: {qtd:,}\n")
-                f.write("\n")
-            
-            f.write("="*70 + "\n")
+        total = self.resumo['total']
+        
+        # Monta o relatório inteiro em memória e grava com uma única escrita
+        linhas = [
+            "="*70,
+            "RELATÓRIO DE ENRIQUECIMENTO - ETAPA 2.2",
+            "="*70,
+            "",
+            f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}",
+            "",
+            "ESTATÍSTICAS GERAIS:",
+            "-" * 70,
+            f"Total de registros: {total:,}",
+            f"Operadoras únicas: {len(self.resumo['cnpjs']):,}",
+            "",
+            "MATCH COM CADASTRO ANS:",
+            "-" * 70,
+        ]
+        matches = self.resumo['status_match'].sort_values(ascending=False, kind='stable')
+        linhas.extend(
+            f"{status}: {qtd:,} ({(qtd / total) * 100:.1f}%)"
+            for status, qtd in matches.items()
+        )
+        linhas.append("")
+        
+        # Distribuição por UF
+        if 'UF' in self.resumo:
+            linhas += ["DISTRIBUIÇÃO POR UF:", "-" * 70]
+            linhas.extend(f"{uf}: {qtd:,}" for uf, qtd in self.resumo['UF'].nlargest(10).items())
+            linhas.append("")
+        
+        # Distribuição por Modalidade
+        if 'Modalidade' in self.resumo:
+            linhas += ["DISTRIBUIÇÃO POR MODALIDADE:", "-" * 70]
+            dist_mod = self.resumo['Modalidade'].sort_values(ascending=False, kind='stable')
+            linhas.extend(f"{mod}: {qtd:,}" for mod, qtd in dist_mod.items())
+            linhas.append("")
+        
+        linhas += ["="*70, ""]
+        
+        with open(arquivo_saida, 'w', encoding='utf-8', buffering=-1) as f:
+            f.write("\n".join(linhas))
         
         print(f"  ✓ Relatório salvo em: {arquivo_saida}")
         logger.info(f"Relatório de enriquecimento gerado: {arquivo_saida}")
     
-    def salvar_dados_enriquecidos(self, arquivo_saida: Path) -> None:
+    def salvar_dados_enriquecidos(
+        self,
+        arquivo_saida: Path,
+        arquivo_csv: Optional[Path] = None
+    ) -> None:
         """
-        Salva dados enriquecidos em CSV.
+        Salva dados enriquecidos em Parquet (e opcionalmente em CSV).
+        
+        Decisão Técnica: Parquet como saída principal
+        - Colunar e tipado: a Etapa 2.3 lê sem reprocessar texto
+        - Compressão zstd: arquivo bem menor que o CSV
         
         Args:
-            arquivo_saida: Path do arquivo de saída
+            arquivo_saida: Path do arquivo Parquet de saída
+            arquivo_csv: Path de uma cópia em CSV (opcional)
         """
         print(f"\n💾 Salvando dados enriquecidos...")
         
-        self.df_enriquecido.to_csv(
+        self.df_enriquecido.to_parquet(
             arquivo_saida,
-            index=False,
-            encoding='utf-8',
-            sep=';'
+            engine='pyarrow',
+            compression='zstd',
+            index=False
         )
         
         tamanho = arquivo_saida.stat().st_size
         print(f"  ✓ Dados salvos: {arquivo_saida.name} ({bytes_para_humano(tamanho)})")
         logger.info(f"Dados enriquecidos salvos: {arquivo_saida}")
+        
+        if arquivo_csv is not None:
+            self.df_enriquecido.to_csv(arquivo_csv, **OPCOES_CSV_SAIDA)
+            
+            tamanho = arquivo_csv.stat().st_size
+            print(f"  ✓ Cópia em CSV: {arquivo_csv.name} ({bytes_para_humano(tamanho)})")
+            logger.info(f"Cópia CSV dos dados enriquecidos salva: {arquivo_csv}")
 
 
 def main():
@@ -393,7 +871,8 @@ def main():
         # Caminhos
         saida_dir = PROJETO_RAIZ / "output"
         arquivo_entrada = saida_dir / "dados_validados.csv"
-        arquivo_saida = saida_dir / "dados_enriquecidos.csv"
+        arquivo_saida = saida_dir / "dados_enriquecidos.parquet"
+        arquivo_saida_csv = saida_dir / "dados_enriquecidos.csv"
         arquivo_relatorio = saida_dir / "relatorio_enriquecimento.txt"
         
         # Criar diretório de saída
@@ -402,20 +881,17 @@ def main():
         # Criar enriquecedor
         enriquecedor = EnriquecedorDados(arquivo_entrada)
         
-        # Executar enriquecimento
-        enriquecedor.carregar_despesas()
-        
+        # Cadastro (pequeno) fica em memória
         caminho_cadastro = enriquecedor.baixar_dados_cadastrais()
         enriquecedor.carregar_dados_cadastrais(caminho_cadastro)
+        enriquecedor.salvar_cache_cadastro()
         
-        enriquecedor.realizar_join()
+        # Despesas: leitura, join e gravação em blocos
+        enriquecedor.processar_stream(arquivo_saida, arquivo_saida_csv)
         
         # Gerar relatório
         enriquecedor.gerar_relatorio_enriquecimento(arquivo_relatorio)
         
-        # Salvar dados
-        enriquecedor.salvar_dados_enriquecidos(arquivo_saida)
-        
         print("\n" + "="*70)
         print("✅ ETAPA 2.2 CONCLUÍDA COM SUCESSO!")
         print("="*70 + "\n")
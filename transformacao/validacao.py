@@ -22,7 +22,14 @@ Uso:
 """
 
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import sys
+import os
+import csv
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import logging
@@ -31,12 +38,31 @@ PROJETO_RAIZ = Path(__file__).resolve().parents[1]
 if str(PROJETO_RAIZ) not in sys.path:
     sys.path.insert(0, str(PROJETO_RAIZ))
 
-from integracao_api.utils import configurar_logging, limpar_cnpj
+from integracao_api.utils import configurar_logging
 
 
 # Configuração de logging
 logger = configurar_logging("validacao.log")
 
+# Pesos do cálculo dos dígitos verificadores do CNPJ (módulo 11)
+PESOS_DV1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+PESOS_DV2 = (6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+
+
+# Valores de motivo_cnpj_invalido ('' = CNPJ válido), na ordem dos códigos
+MOTIVOS_CNPJ_INVALIDO = ['', 'FORMATO_INVALIDO', 'DIGITOS_VERIFICADORES_INVALIDOS', 'DESCONHECIDO']
+
+# Threads das validações de cada bloco (uma por validação, no máximo)
+THREADS_VALIDACAO = min(4, os.cpu_count() or 1)
+
+# Flags somadas no resumo da validação (acumuladas bloco a bloco)
+FLAGS_RESUMO = [
+    'cnpj_valido',
+    'valor_valido', 'valor_nulo', 'valor_negativo', 'valor_zerado',
+    'razao_valida', 'razao_vazia', 'razao_muito_curta',
+    'trimestre_valido', 'ano_valido',
+]
+
 
 class ValidadorDados:
     """
@@ -59,22 +85,66 @@ class ValidadorDados:
         """
         self.arquivo_entrada = arquivo_entrada
         self.df = None
+        self.resumo = None
         
         logger.info("="*70)
         logger.info("INICIANDO ETAPA 2.1: VALIDAÇÃO DE DADOS")
         logger.info("="*70)
     
+    @staticmethod
+    def _colunas_csv(caminho: Path) -> list:
+        """
+        Lê o cabeçalho do consolidado.
+        
+        Args:
+            caminho: Path do CSV consolidado
+        
+        Returns:
+            Nomes das colunas, na ordem do arquivo
+        """
+        # utf-8-sig: o leitor do PyArrow descarta o BOM, então o nome da 1ª
+        # coluna precisa vir sem ele
+        with open(caminho, 'r', encoding='utf-8-sig', newline='') as f:
+            return next(csv.reader(f, delimiter=';'), [])
+    
+    @staticmethod
+    def _opcoes_csv(colunas: list, tamanho_bloco: int = 64 << 20) -> dict:
+        """
+        Opções do leitor CSV do PyArrow para o consolidado (separado por ';').
+        
+        Todas as colunas são lidas como strings Arrow: sem tipo declarado o
+        leitor infere o tipo pelo primeiro bloco (CNPJ vira número e um valor
+        fora do padrão num bloco seguinte derruba a leitura). A conversão
+        numérica fica com as validações, que marcam o inválido como nulo.
+        
+        Args:
+            colunas: Colunas do arquivo (cabeçalho)
+            tamanho_bloco: Tamanho (bytes) de cada bloco lido
+        
+        Returns:
+            Dicionário com read_options, parse_options e convert_options
+        """
+        return {
+            'read_options': pacsv.ReadOptions(
+                encoding='utf-8',
+                block_size=tamanho_bloco,
+                use_threads=True
+            ),
+            'parse_options': pacsv.ParseOptions(delimiter=';'),
+            'convert_options': pacsv.ConvertOptions(
+                column_types={coluna: pa.string() for coluna in colunas},
+                strings_can_be_null=True
+            ),
+        }
+    
     def carregar_dados(self) -> None:
         """Carrega dados do CSV consolidado."""
         logger.info(f"Carregando dados de: {self.arquivo_entrada}")
         
         try:
-            self.df = pd.read_csv(
-                self.arquivo_entrada,
-                sep=';',
-                encoding='utf-8',
-                low_memory=False
-            )
+            colunas = self._colunas_csv(self.arquivo_entrada)
+            tabela = pacsv.read_csv(self.arquivo_entrada, **self._opcoes_csv(colunas))
+            self.df = tabela.to_pandas(self_destruct=True, split_blocks=True)
             print(f"✓ Dados carregados: {len(self.df):,} registros")
             logger.info(f"Dados carregados: {len(self.df)} registros")
         
@@ -102,99 +172,271 @@ class ValidadorDados:
             >>> validar_digito_cnpj("11222333000181")
             True
         """
-        if not cnpj or len(cnpj) != 14 or not cnpj.isdigit():
+        if not cnpj or len(cnpj) != 14:
+            return False
+        
+        # Bytes ASCII: cada dígito vira inteiro por subtração, sem int() por
+        # caractere (não ASCII vira '?' e reprova no isdigit)
+        buffer = cnpj.encode('ascii', errors='replace')
+        if not buffer.isdigit():
             return False
         
         # CNPJ não pode ser sequência de números iguais
-        if cnpj == cnpj[0] * 14:
+        if buffer.count(buffer[0]) == 14:
             return False
         
+        digitos = [c - 0x30 for c in buffer]
+        
         # Calcular primeiro dígito verificador
-        pesos_1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        soma_1 = sum(int(cnpj[i]) * pesos_1[i] for i in range(12))
+        soma_1 = sum(d * p for d, p in zip(digitos, PESOS_DV1))
         resto_1 = soma_1 % 11
         digito_1 = 0 if resto_1 < 2 else 11 - resto_1
         
-        if int(cnpj[12]) != digito_1:
+        if digitos[12] != digito_1:
             return False
         
         # Calcular segundo dígito verificador
-        pesos_2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        soma_2 = sum(int(cnpj[i]) * pesos_2[i] for i in range(13))
+        soma_2 = sum(d * p for d, p in zip(digitos, PESOS_DV2))
         resto_2 = soma_2 % 11
         digito_2 = 0 if resto_2 < 2 else 11 - resto_2
         
-        return int(cnpj[13]) == digito_2
+        return digitos[13] == digito_2
     
-    def validar_cnpjs(self) -> pd.DataFrame:
+    @staticmethod
+    def _matriz_cnpjs(cnpjs: pd.Series) -> np.ndarray:
         """
-        Valida todos os CNPJs do dataset.
+        Converte CNPJs de 14 caracteres numa matriz (N, 14) de bytes ASCII.
         
-        Validações:
-        1. Formato (14 dígitos)
-        2. Não zerado
-        3. Dígitos verificadores
+        Args:
+            cnpjs: CNPJs limpos, todos com 14 caracteres
         
         Returns:
-            DataFrame com colunas de validação adicionadas
+            Array uint8 com um CNPJ por linha
         """
-        print("\n📋 Validando CNPJs...")
-        logger.info("Iniciando validação de CNPJs")
+        if cnpjs.empty:
+            return np.zeros((0, 14), dtype=np.uint8)
         
-        if 'CNPJ' not in self.df.columns:
-            logger.warning("Coluna CNPJ não encontrada!")
-            return self.df
+        # Caractere não ASCII vira '?' (1 byte): mantém 14 posições por CNPJ
+        # e o CNPJ resulta inválido
+        buffer = cnpjs.str.cat().encode('ascii', errors='replace')
+        return np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 14)
+    
+    @staticmethod
+    def _digitos_verificadores_validos(matriz: np.ndarray) -> np.ndarray:
+        """
+        Valida os dígitos verificadores de uma matriz (N, 14) de CNPJs.
+        
+        Args:
+            matriz: Bytes ASCII dos CNPJs, só dígitos
+        
+        Returns:
+            Array booleano (True = dígitos verificadores válidos)
+        """
+        digitos = matriz - ord('0')
+        
+        # Soma ponderada coluna a coluna com os pesos constantes: cada passo é
+        # um multiplica-e-soma sobre uint8 (~2x mais rápido que o produto
+        # matriz-vetor inteiro, que o NumPy não delega ao BLAS)
+        def soma_ponderada(pesos: tuple) -> np.ndarray:
+            soma = np.zeros(len(digitos), dtype=np.int32)
+            for coluna, peso in enumerate(pesos):
+                soma += digitos[:, coluna] * np.int32(peso)
+            return soma
+        
+        resto_1 = soma_ponderada(PESOS_DV1) % 11
+        digito_1 = np.where(resto_1 < 2, 0, 11 - resto_1)
         
-        # Limpar CNPJs
-        self.df['CNPJ'] = self.df['CNPJ'].astype(str).apply(limpar_cnpj)
+        resto_2 = soma_ponderada(PESOS_DV2) % 11
+        digito_2 = np.where(resto_2 < 2, 0, 11 - resto_2)
         
-        # Validar formato (vetorizado)
-        self.df['cnpj_formato_valido'] = (
-            self.df['CNPJ'].str.len().eq(14)
-            & self.df['CNPJ'].str.isdigit()
-            & (self.df['CNPJ'] != "00000000000000")
+        # CNPJ não pode ser sequência de números iguais
+        repetidos = (digitos == digitos[:, :1]).all(axis=1)
+        
+        return (digitos[:, 12] == digito_1) & (digitos[:, 13] == digito_2) & ~repetidos
+    
+    @classmethod
+    def validar_digitos_cnpjs(cls, cnpjs: pd.Series) -> np.ndarray:
+        """
+        Valida os dígitos verificadores de vários CNPJs de uma vez.
+        
+        Versão vetorizada de validar_digito_cnpj: os CNPJs viram uma matriz
+        (N, 14) de dígitos e cada dígito verificador sai de uma soma ponderada
+        coluna a coluna com os pesos constantes, sem chamada Python por linha.
+        
+        Args:
+            cnpjs: CNPJs limpos, todos com 14 dígitos
+        
+        Returns:
+            Array booleano (True = dígitos verificadores válidos)
+        """
+        return cls._digitos_verificadores_validos(cls._matriz_cnpjs(cnpjs))
+    
+    @classmethod
+    def _colunas_cnpj(cls, df: pd.DataFrame) -> dict:
+        """
+        Calcula a limpeza e as flags de CNPJ (sem alterar o DataFrame).
+        
+        Args:
+            df: DataFrame do consolidado
+        
+        Returns:
+            Dicionário coluna -> valores (vazio se não houver coluna CNPJ)
+        """
+        if 'CNPJ' not in df.columns:
+            logger.warning("Coluna CNPJ não encontrada!")
+            return {}
+        
+        # Cada CNPJ se repete em vários trimestres: limpeza e validação rodam
+        # só sobre os valores únicos e o resultado é espalhado pelas linhas
+        codigos, unicos = pd.factorize(df['CNPJ'], use_na_sentinel=False)
+        
+        # Limpar CNPJs (regex vetorizada) e repor zeros à esquerda perdidos
+        # quando o CNPJ passou por uma coluna numérica; vazio continua vazio
+        digitos = pd.Series(unicos, dtype='str').str.replace(r'\D+', '', regex=True)
+        cnpjs = digitos.str.zfill(14).where(digitos.str.len() > 0, '')
+        
+        # Validar formato numa única passada sobre os bytes dos CNPJs com 14
+        # caracteres: todos dígitos ASCII e não zerado
+        tamanho_valido = cnpjs.str.len().eq(14).to_numpy(dtype=bool)
+        matriz = cls._matriz_cnpjs(cnpjs[tamanho_valido])
+        formato = (
+            ((matriz >= ord('0')) & (matriz <= ord('9'))).all(axis=1)
+            & (matriz != ord('0')).any(axis=1)
         )
-
+        formato_valido = np.zeros(len(cnpjs), dtype=bool)
+        formato_valido[tamanho_valido] = formato
+        
         # Validar dígitos verificadores somente para CNPJs com formato válido
-        self.df['cnpj_digitos_validos'] = False
-        mask_formato_valido = self.df['cnpj_formato_valido'].fillna(False)
-        if mask_formato_valido.any():
-            self.df.loc[mask_formato_valido, 'cnpj_digitos_validos'] = (
-                self.df.loc[mask_formato_valido, 'CNPJ']
-                .apply(self.validar_digito_cnpj)
-            )
+        # (vetorizado, em lote, sobre a mesma matriz)
+        digitos_validos = np.zeros(len(cnpjs), dtype=bool)
+        digitos_validos[formato_valido] = cls._digitos_verificadores_validos(matriz[formato])
+        
+        formato_valido = formato_valido[codigos]
+        digitos_validos = digitos_validos[codigos]
         
         # Status final
-        self.df['cnpj_valido'] = self.df['cnpj_formato_valido'] & self.df['cnpj_digitos_validos']
+        valido = formato_valido & digitos_validos
+        
+        # Motivo da invalidez: primeira condição verdadeira, na ordem; guardado
+        # como categoria (1 byte por linha) em vez de texto repetido
+        codigos_motivo = np.select(
+            [valido, ~formato_valido, ~digitos_validos],
+            [0, 1, 2],
+            default=3
+        ).astype(np.int8)
+        motivo = pd.Categorical.from_codes(codigos_motivo, categories=MOTIVOS_CNPJ_INVALIDO)
+        
+        return {
+            'CNPJ': cnpjs.array.take(codigos),
+            'cnpj_formato_valido': formato_valido,
+            'cnpj_digitos_validos': digitos_validos,
+            'cnpj_valido': valido,
+            'motivo_cnpj_invalido': motivo,
+        }
+    
+    @staticmethod
+    def _colunas_valores(df: pd.DataFrame) -> dict:
+        """
+        Calcula as flags de valores numéricos (sem alterar o DataFrame).
+        
+        Args:
+            df: DataFrame do consolidado
+        
+        Returns:
+            Dicionário coluna -> valores (vazio se não houver ValorDespesas)
+        """
+        if 'ValorDespesas' not in df.columns:
+            logger.warning("Coluna ValorDespesas não encontrada!")
+            return {}
+        
+        # Converter para numérico
+        despesas = pd.to_numeric(df['ValorDespesas'], errors='coerce')
+        valores = despesas.to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        # Validações direto sobre o buffer float64 (NaN já é falso em < e ==)
+        nulo = np.isnan(valores)
+        negativo = valores < 0
+        
+        return {
+            'ValorDespesas': despesas,
+            'valor_nulo': nulo,
+            'valor_negativo': negativo,
+            'valor_zerado': valores == 0,
+            'valor_valido': ~(nulo | negativo),
+        }
+    
+    @staticmethod
+    def _colunas_razao_social(df: pd.DataFrame) -> dict:
+        """
+        Calcula a limpeza e as flags de razão social (sem alterar o DataFrame).
+        
+        Args:
+            df: DataFrame do consolidado
+        
+        Returns:
+            Dicionário coluna -> valores (vazio se não houver RazaoSocial)
+        """
+        if 'RazaoSocial' not in df.columns:
+            logger.warning("Coluna RazaoSocial não encontrada!")
+            return {}
+        
+        # Limpar strings (nulos continuam nulos, sem virar o texto 'nan')
+        razoes = df['RazaoSocial'].astype('str').str.strip()
+        
+        # Validações
+        vazia = razoes.isna() | razoes.eq('')
+        muito_curta = razoes.str.len().fillna(0).lt(3)
+        
+        return {
+            'RazaoSocial': razoes,
+            'razao_vazia': vazia,
+            'razao_muito_curta': muito_curta,
+            'razao_valida': ~(vazia | muito_curta),
+        }
+    
+    @staticmethod
+    def _colunas_datas(df: pd.DataFrame) -> dict:
+        """
+        Calcula as flags de trimestre e ano (sem alterar o DataFrame).
         
-        # Motivo da invalidez
-        def obter_motivo(row):
-            if row['cnpj_valido']:
-                return ''
-            elif not row['cnpj_formato_valido']:
-                return 'FORMATO_INVALIDO'
-            elif not row['cnpj_digitos_validos']:
-                return 'DIGITOS_VERIFICADORES_INVALIDOS'
-            return 'DESCONHECIDO'
+        Args:
+            df: DataFrame do consolidado
+        
+        Returns:
+            Dicionário coluna -> valores
+        """
+        colunas = {}
         
-        self.df['motivo_cnpj_invalido'] = self.df.apply(obter_motivo, axis=1)
+        # Inteiros reduzidos ao menor tipo que comporta os valores (int8 para
+        # trimestre, int16 para ano); com valor inválido/nulo ficam em float64
         
-        # Estatísticas
-        total = len(self.df)
-        validos = self.df['cnpj_valido'].sum()
-        invalidos = total - validos
+        # Validar trimestre
+        if 'Trimestre' in df.columns:
+            trimestre = pd.to_numeric(df['Trimestre'], errors='coerce', downcast='integer')
+            colunas['Trimestre'] = trimestre
+            colunas['trimestre_valido'] = trimestre.between(1, 4)
         
-        print(f"  ✓ CNPJs válidos: {validos:,} ({validos/total*100:.1f}%)")
-        print(f"  ✗ CNPJs inválidos: {invalidos:,} ({invalidos/total*100:.1f}%)")
+        # Validar ano
+        if 'Ano' in df.columns:
+            ano = pd.to_numeric(df['Ano'], errors='coerce', downcast='integer')
+            colunas['Ano'] = ano
+            colunas['ano_valido'] = ano.between(2000, 2030)
         
-        if invalidos > 0:
-            print(f"\n  Motivos de invalidez:")
-            motivos = self.df[~self.df['cnpj_valido']]['motivo_cnpj_invalido'].value_counts()
-            for motivo, qtd in motivos.items():
-                print(f"    - {motivo}: {qtd:,}")
+        return colunas
+    
+    def validar_cnpjs(self) -> pd.DataFrame:
+        """
+        Valida todos os CNPJs do dataset.
         
-        logger.info(f"Validação de CNPJs concluída: {validos} válidos, {invalidos} inválidos")
+        Validações:
+        1. Formato (14 dígitos)
+        2. Não zerado
+        3. Dígitos verificadores
         
+        Returns:
+            DataFrame com colunas de validação adicionadas
+        """
+        self.df = self.df.assign(**self._colunas_cnpj(self.df))
         return self.df
     
     def validar_valores_numericos(self) -> pd.DataFrame:
@@ -209,39 +451,7 @@ class ValidadorDados:
         Returns:
             DataFrame com validações
         """
-        print("\n💰 Validando valores numéricos...")
-        logger.info("Iniciando validação de valores")
-        
-        if 'ValorDespesas' not in self.df.columns:
-            logger.warning("Coluna ValorDespesas não encontrada!")
-            return self.df
-        
-        # Converter para numérico
-        self.df['ValorDespesas'] = pd.to_numeric(self.df['ValorDespesas'], errors='coerce')
-        
-        # Validações
-        self.df['valor_nulo'] = self.df['ValorDespesas'].isna()
-        self.df['valor_negativo'] = self.df['ValorDespesas'] < 0
-        self.df['valor_zerado'] = self.df['ValorDespesas'] == 0
-        self.df['valor_valido'] = ~(self.df['valor_nulo'] | self.df['valor_negativo'])
-        
-        # Estatísticas
-        total = len(self.df)
-        validos = self.df['valor_valido'].sum()
-        nulos = self.df['valor_nulo'].sum()
-        negativos = self.df['valor_negativo'].sum()
-        zerados = self.df['valor_zerado'].sum()
-        
-        print(f"  ✓ Valores válidos: {validos:,} ({validos/total*100:.1f}%)")
-        if nulos > 0:
-            print(f"  ⚠️  Valores nulos: {nulos:,} ({nulos/total*100:.1f}%)")
-        if negativos > 0:
-            print(f"  ⚠️  Valores negativos: {negativos:,} ({negativos/total*100:.1f}%)")
-        if zerados > 0:
-            print(f"  ⚠️  Valores zerados: {zerados:,} ({zerados/total*100:.1f}%)")
-        
-        logger.info(f"Validação de valores concluída: {validos} válidos")
-        
+        self.df = self.df.assign(**self._colunas_valores(self.df))
         return self.df
     
     def validar_razao_social(self) -> pd.DataFrame:
@@ -255,73 +465,212 @@ class ValidadorDados:
         Returns:
             DataFrame com validações
         """
-        print("\n🏢 Validando razões sociais...")
-        logger.info("Iniciando validação de razões sociais")
-        
-        if 'RazaoSocial' not in self.df.columns:
-            logger.warning("Coluna RazaoSocial não encontrada!")
-            return self.df
-        
-        # Limpar strings
-        self.df['RazaoSocial'] = self.df['RazaoSocial'].astype(str).str.strip()
+        self.df = self.df.assign(**self._colunas_razao_social(self.df))
+        return self.df
+    
+    def validar_datas(self) -> pd.DataFrame:
+        """
+        Valida trimestres e anos.
         
-        # Validações
-        self.df['razao_vazia'] = (
-            self.df['RazaoSocial'].isna() | 
-            (self.df['RazaoSocial'] == '') | 
-            (self.df['RazaoSocial'] == 'nan')
-        )
+        Returns:
+            DataFrame com validações
+        """
+        self.df = self.df.assign(**self._colunas_datas(self.df))
+        return self.df
+    
+    def validar_bloco(self, bloco: pd.DataFrame) -> pd.DataFrame:
+        """
+        Executa todas as validações sobre um conjunto de registros.
         
-        self.df['razao_muito_curta'] = self.df['RazaoSocial'].str.len() < 3
-        self.df['razao_valida'] = ~(self.df['razao_vazia'] | self.df['razao_muito_curta'])
+        Decisão Técnica: Validações em paralelo (threads)
+        - As quatro validações leem e geram colunas disjuntas
+        - O trabalho pesado roda em NumPy/Arrow, fora do GIL
         
-        # Estatísticas
-        total = len(self.df)
-        validas = self.df['razao_valida'].sum()
-        vazias = self.df['razao_vazia'].sum()
-        curtas = self.df['razao_muito_curta'].sum()
+        Args:
+            bloco: DataFrame do consolidado (arquivo inteiro ou um bloco)
         
-        print(f"  ✓ Razões válidas: {validas:,} ({validas/total*100:.1f}%)")
-        if vazias > 0:
-            print(f"  ⚠️  Razões vazias: {vazias:,} ({vazias/total*100:.1f}%)")
-        if curtas > 0:
-            print(f"  ⚠️  Razões muito curtas: {curtas:,} ({curtas/total*100:.1f}%)")
+        Returns:
+            DataFrame com as colunas de validação
+        """
+        validacoes = (
+            self._colunas_cnpj,
+            self._colunas_valores,
+            self._colunas_razao_social,
+            self._colunas_datas,
+        )
+        with ThreadPoolExecutor(max_workers=THREADS_VALIDACAO) as executor:
+            resultados = list(executor.map(lambda validacao: validacao(bloco), validacoes))
         
-        logger.info(f"Validação de razões sociais concluída: {validas} válidas")
+        # Junta na ordem das validações (mesma ordem de colunas da saída)
+        colunas = {}
+        for resultado in resultados:
+            colunas.update(resultado)
         
+        self.df = bloco.assign(**colunas)
         return self.df
     
-    def validar_datas(self) -> pd.DataFrame:
+    def _acumular_resumo(self, validado: pd.DataFrame) -> None:
         """
-        Valida trimestres e anos.
+        Acumula as contagens usadas no resumo e no relatório de qualidade.
         
-        Returns:
-            DataFrame com validações
+        Args:
+            validado: DataFrame validado (arquivo inteiro ou um bloco)
         """
-        print("\n📅 Validando datas (trimestre/ano)...")
-        logger.info("Iniciando validação de datas")
+        # Todas as flags somadas de uma vez (inválidos = total - válidos)
+        presentes = [coluna for coluna in FLAGS_RESUMO if coluna in validado.columns]
+        parcial = {coluna: int(quantidade) for coluna, quantidade in validado[presentes].sum().items()}
+        motivos = pd.Series(dtype='int64')
+        if 'cnpj_valido' in validado.columns:
+            motivos = validado.loc[~validado['cnpj_valido'], 'motivo_cnpj_invalido'].value_counts()
+        
+        if self.resumo is None:
+            self.resumo = {'total': len(validado), 'motivos': motivos, **parcial}
+            return
+        
+        self.resumo['total'] += len(validado)
+        self.resumo['motivos'] = self.resumo['motivos'].add(motivos, fill_value=0).astype('int64')
+        for coluna, quantidade in parcial.items():
+            self.resumo[coluna] = self.resumo.get(coluna, 0) + quantidade
+    
+    def _exibir_resumo(self) -> None:
+        """Exibe as estatísticas de cada validação a partir do resumo."""
+        total = self.resumo['total']
         
-        # Validar trimestre
-        if 'Trimestre' in self.df.columns:
-            self.df['Trimestre'] = pd.to_numeric(self.df['Trimestre'], errors='coerce')
-            self.df['trimestre_valido'] = self.df['Trimestre'].between(1, 4)
-            
-            invalidos_trim = (~self.df['trimestre_valido']).sum()
-            if invalidos_trim > 0:
-                print(f"  ⚠️  Trimestres inválidos: {invalidos_trim:,}")
+        def percentual(quantidade: int) -> str:
+            return f"{quantidade:,} ({quantidade/total*100:.1f}%)"
         
-        # Validar ano
-        if 'Ano' in self.df.columns:
-            self.df['Ano'] = pd.to_numeric(self.df['Ano'], errors='coerce')
-            self.df['ano_valido'] = self.df['Ano'].between(2000, 2030)
+        if 'cnpj_valido' in self.resumo:
+            validos = self.resumo['cnpj_valido']
+            invalidos = total - validos
+            
+            print("\n📋 CNPJs:")
+            print(f"  ✓ CNPJs válidos: {percentual(validos)}")
+            print(f"  ✗ CNPJs inválidos: {percentual(invalidos)}")
             
-            invalidos_ano = (~self.df['ano_valido']).sum()
-            if invalidos_ano > 0:
-                print(f"  ⚠️  Anos inválidos: {invalidos_ano:,}")
+            if invalidos > 0:
+                print(f"\n  Motivos de invalidez:")
+                # Categórico: value_counts traz também os motivos sem ocorrência
+                motivos = self.resumo['motivos']
+                motivos = motivos[motivos > 0].sort_values(ascending=False, kind='stable')
+                for motivo, qtd in motivos.items():
+                    print(f"    - {motivo}: {qtd:,}")
+            
+            logger.info(f"Validação de CNPJs concluída: {validos} válidos, {invalidos} inválidos")
+        
+        if 'valor_valido' in self.resumo:
+            print("\n💰 Valores numéricos:")
+            print(f"  ✓ Valores válidos: {percentual(self.resumo['valor_valido'])}")
+            if self.resumo['valor_nulo'] > 0:
+                print(f"  ⚠️  Valores nulos: {percentual(self.resumo['valor_nulo'])}")
+            if self.resumo['valor_negativo'] > 0:
+                print(f"  ⚠️  Valores negativos: {percentual(self.resumo['valor_negativo'])}")
+            if self.resumo['valor_zerado'] > 0:
+                print(f"  ⚠️  Valores zerados: {percentual(self.resumo['valor_zerado'])}")
+            
+            logger.info(f"Validação de valores concluída: {self.resumo['valor_valido']} válidos")
+        
+        if 'razao_valida' in self.resumo:
+            print("\n🏢 Razões sociais:")
+            print(f"  ✓ Razões válidas: {percentual(self.resumo['razao_valida'])}")
+            if self.resumo['razao_vazia'] > 0:
+                print(f"  ⚠️  Razões vazias: {percentual(self.resumo['razao_vazia'])}")
+            if self.resumo['razao_muito_curta'] > 0:
+                print(f"  ⚠️  Razões muito curtas: {percentual(self.resumo['razao_muito_curta'])}")
+            
+            logger.info(f"Validação de razões sociais concluída: {self.resumo['razao_valida']} válidas")
+        
+        print("\n📅 Datas (trimestre/ano):")
+        if 'trimestre_valido' in self.resumo and self.resumo['trimestre_valido'] < total:
+            print(f"  ⚠️  Trimestres inválidos: {total - self.resumo['trimestre_valido']:,}")
+        if 'ano_valido' in self.resumo and self.resumo['ano_valido'] < total:
+            print(f"  ⚠️  Anos inválidos: {total - self.resumo['ano_valido']:,}")
         
         logger.info("Validação de datas concluída")
+    
+    @staticmethod
+    def _escrever_csv(df: pd.DataFrame, saida, cabecalho: bool = True) -> None:
+        """
+        Grava um DataFrame validado em CSV com o escritor do PyArrow.
         
-        return self.df
+        A formatação roda em C++ (multithread), bem mais rápida que o
+        to_csv do pandas para as várias colunas de flags.
+        
+        Args:
+            df: DataFrame validado (arquivo inteiro ou um bloco)
+            saida: Arquivo binário aberto para escrita
+            cabecalho: Se a linha de cabeçalho deve ser gravada
+        """
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        pacsv.write_csv(
+            tabela,
+            saida,
+            write_options=pacsv.WriteOptions(
+                include_header=cabecalho,
+                delimiter=';',
+                quoting_style='needed'
+            )
+        )
+    
+    def processar_stream(self, arquivo_saida: Path, tamanho_bloco: int = 64 << 20) -> None:
+        """
+        Lê o consolidado em blocos, valida e grava cada bloco validado.
+        
+        Decisão Técnica: Processamento em blocos
+        - Só um bloco de registros fica em memória
+        - Estatísticas de validação são acumuladas bloco a bloco
+        
+        Args:
+            arquivo_saida: Path do CSV de dados validados
+            tamanho_bloco: Tamanho (bytes) de cada bloco lido
+        """
+        print(f"\n🔎 Validando dados em blocos...")
+        logger.info(f"Validação em blocos a partir de: {self.arquivo_entrada}")
+        
+        leitor = pacsv.open_csv(
+            self.arquivo_entrada,
+            **self._opcoes_csv(self._colunas_csv(self.arquivo_entrada), tamanho_bloco)
+        )
+        
+        blocos = 0
+        with leitor, open(arquivo_saida, 'wb') as saida:
+            for lote in leitor:
+                validado = self.validar_bloco(lote.to_pandas(split_blocks=True))
+                self._acumular_resumo(validado)
+                self._escrever_csv(validado, saida, cabecalho=blocos == 0)
+                blocos += 1
+        
+        if blocos == 0:
+            raise Exception("Nenhum registro encontrado no consolidado")
+        
+        print(f"  ✓ {self.resumo['total']:,} registros em {blocos} bloco(s)")
+        logger.info(f"Dados validados: {self.resumo['total']} registros em {blocos} blocos")
+        self._exibir_resumo()
+        
+        print(f"\n  ✓ Dados salvos em: {arquivo_saida}")
+        logger.info(f"Dados validados salvos em: {arquivo_saida}")
+    
+    @staticmethod
+    def marcador_cache(arquivo_entrada: Path, diretorio_cache: Path) -> Path:
+        """
+        Caminho do marcador de uma validação concluída para o arquivo de entrada.
+        
+        A chave combina caminho, data de modificação e tamanho do consolidado
+        e a data de modificação deste módulo: alterar a entrada ou as regras
+        de validação invalida o marcador.
+        
+        Args:
+            arquivo_entrada: Path do CSV consolidado
+            diretorio_cache: Diretório onde os marcadores são gravados
+        
+        Returns:
+            Path do arquivo marcador (.ok)
+        """
+        info = arquivo_entrada.stat()
+        codigo = Path(__file__).stat().st_mtime_ns
+        chave = hashlib.sha1(
+            f"{arquivo_entrada.resolve()}:{info.st_mtime_ns}:{info.st_size}:{codigo}".encode()
+        ).hexdigest()
+        return diretorio_cache / f"validacao_{chave}.ok"
     
     def gerar_relatorio_qualidade(self, arquivo_saida: Path) -> None:
         """
@@ -332,32 +681,37 @@ class ValidadorDados:
         """
         print("\n📊 Gerando relatório de qualidade...")
         
+        # Validação em memória (sem processar_stream): resumo do DataFrame
+        if self.resumo is None:
+            self._acumular_resumo(self.df)
+        resumo = self.resumo
+        
         with open(arquivo_saida, 'w', encoding='utf-8') as f:
             f.write("="*70 + "\n")
             f.write("RELATÓRIO DE QUALIDADE DOS DADOS - ETAPA 2.1\n")
             f.write("="*70 + "\n\n")
             f.write(f"Data/Hora: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-            f.write(f"Total de Registros: {len(self.df):,}\n\n")
+            f.write(f"Total de Registros: {resumo['total']:,}\n\n")
             
             # CNPJs
             f.write("VALIDAÇÃO DE CNPJs:\n")
             f.write("-" * 70 + "\n")
-            f.write(f"Válidos: {self.df['cnpj_valido'].sum():,}\n")
-            f.write(f"Inválidos: {(~self.df['cnpj_valido']).sum():,}\n\n")
+            f.write(f"Válidos: {resumo['cnpj_valido']:,}\n")
+            f.write(f"Inválidos: {resumo['total'] - resumo['cnpj_valido']:,}\n\n")
             
             # Valores
             f.write("VALIDAÇÃO DE VALORES:\n")
             f.write("-" * 70 + "\n")
-            f.write(f"Válidos: {self.df['valor_valido'].sum():,}\n")
-            f.write(f"Nulos: {self.df['valor_nulo'].sum():,}\n")
-            f.write(f"Negativos: {self.df['valor_negativo'].sum():,}\n")
-            f.write(f"Zerados: {self.df['valor_zerado'].sum():,}\n\n")
+            f.write(f"Válidos: {resumo['valor_valido']:,}\n")
+            f.write(f"Nulos: {resumo['valor_nulo']:,}\n")
+            f.write(f"Negativos: {resumo['valor_negativo']:,}\n")
+            f.write(f"Zerados: {resumo['valor_zerado']:,}\n\n")
             
             # Razões Sociais
             f.write("VALIDAÇÃO DE RAZÕES SOCIAIS:\n")
             f.write("-" * 70 + "\n")
-            f.write(f"Válidas: {self.df['razao_valida'].sum():,}\n")
-            f.write(f"Vazias: {self.df['razao_vazia'].sum():,}\n\n")
+            f.write(f"Válidas: {resumo['razao_valida']:,}\n")
+            f.write(f"Vazias: {resumo['razao_vazia']:,}\n\n")
             
             f.write("="*70 + "\n")
         
@@ -373,7 +727,8 @@ class ValidadorDados:
         """
         print(f"\n💾 Salvando dados validados...")
         
-        self.df.to_csv(arquivo_saida, index=False, encoding='utf-8', sep=';')
+        with open(arquivo_saida, 'wb') as saida:
+            self._escrever_csv(self.df, saida)
         
         print(f"  ✓ Dados salvos em: {arquivo_saida}")
         logger.info(f"Dados validados salvos em: {arquivo_saida}")
@@ -395,21 +750,24 @@ def main():
         # Criar diretório de saída
         arquivo_saida.parent.mkdir(parents=True, exist_ok=True)
         
-        # Criar validador
-        validador = ValidadorDados(arquivo_entrada)
-        
-        # Executar validações
-        validador.carregar_dados()
-        validador.validar_cnpjs()
-        validador.validar_valores_numericos()
-        validador.validar_razao_social()
-        validador.validar_datas()
-        
-        # Gerar relatório
-        validador.gerar_relatorio_qualidade(arquivo_relatorio)
-        
-        # Salvar dados
-        validador.salvar_dados_validados(arquivo_saida)
+        # Consolidado inalterado desde a última validação: reaproveita saídas
+        marcador = ValidadorDados.marcador_cache(arquivo_entrada, saida_dir / ".cache")
+        if marcador.exists() and arquivo_saida.exists() and arquivo_relatorio.exists():
+            print(f"\n♻️  Consolidado sem alterações: reaproveitando {arquivo_saida.name}")
+            logger.info(f"Validação reaproveitada do cache: {marcador.name}")
+        else:
+            # Criar validador
+            validador = ValidadorDados(arquivo_entrada)
+            
+            # Validar e salvar em blocos
+            validador.processar_stream(arquivo_saida)
+            
+            # Gerar relatório
+            validador.gerar_relatorio_qualidade(arquivo_relatorio)
+            
+            # Marcar validação concluída (só após todas as saídas gravadas)
+            marcador.parent.mkdir(parents=True, exist_ok=True)
+            marcador.touch()
         
         print("\n" + "="*70)
         print("✅ ETAPA 2.1 CONCLUÍDA COM SUCESSO!")